@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+
+# Coarseness of the supported calendars; series are aligned on the coarsest one
+FREQ_ORDER = {"D": 0, "M": 1, "Q": 2, "A": 3}
+PERIOD_ALIASES = {"D": "D", "M": "M", "Q": "Q", "A": "Y"}
+INTERANNUAL_PERIODS = {"D": 1, "M": 12, "Q": 4, "H": 2, "S": 2, "A": 1, "Y": 1}
+RESAMPLE_RULES = ("last", "mean", "sum")
+
+
+def normalize_frequency(freq):
+    # ECB FREQ codes / infer_frequency() output -> one of FREQ_ORDER
+    freq = (freq or "").upper()
+    if freq in ("M", "Q", "A"):
+        return freq
+    if freq == "Y":
+        return "A"
+    if freq in ("H", "S"):
+        return "Q"  # half-years sit on the quarterly calendar
+    return "D"
+
+
+class AlignedPanel:
+    # N series on one shared calendar: values[t, i] is series i at dates[t].
+    # interannual[name] is the number of the series' own observations per year.
+
+    def __init__(self, names, dates, values, freq, source_freqs=None, interannual=None):
+        self.names = list(names)
+        self.dates = pd.DatetimeIndex(dates)
+        self.values = values
+        self.freq = freq
+        self.source_freqs = source_freqs or {}
+        self.interannual = interannual or {}
+
+    def __len__(self):
+        return len(self.dates)
+
+    def resampled(self, name):
+        return self.source_freqs.get(name, self.freq) != self.freq
+
+    def to_frame(self):
+        return pd.DataFrame(self.values, index=self.dates, columns=self.names)
+
+    def with_values(self, values):
+        return AlignedPanel(self.names, self.dates, values, self.freq, self.source_freqs, self.interannual)
+
+    def select(self, names):
+        # The panel restricted to the given series, in that order
+        columns = [self.names.index(name) for name in names]
+        return AlignedPanel(names, self.dates, self.values[:, columns], self.freq, self.source_freqs, self.interannual)
+
+    # ------------------ Transforms ------------------
+    def shift_change(self, periods, rate):
+        # Change over `periods` of each series' own observations (an int, or
+        # {name: int}), written back on the rows of the later observation. A
+        # series observed on some calendar rows only (irregular days, half-years
+        # on the quarterly calendar) is compared with its previous observation,
+        # not with the empty row before it.
+        values = np.full_like(self.values, np.nan)
+        for i, name in enumerate(self.names):
+            n = periods.get(name, 1) if isinstance(periods, dict) else periods
+            rows = np.flatnonzero(~np.isnan(self.values[:, i]))
+            if 0 < n < len(rows):
+                current, previous = self.values[rows[n:], i], self.values[rows[:-n], i]
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    values[rows[n:], i] = (current / previous - 1) * 100 if rate else current - previous
+        return self.with_values(values)
+
+    def transform(self, view_option, sub_option):
+        # Returns (panel, label suffix) for the dashboard view options
+        if view_option == "Period-on-Period":
+            if sub_option == "Rate of Change":
+                return self.shift_change(1, rate=True), " (% Change)"
+            if sub_option == "Difference":
+                return self.shift_change(1, rate=False), " (Diff)"
+        elif view_option == "Interannual":
+            periods = {name: self.interannual.get(name, INTERANNUAL_PERIODS[self.freq]) for name in self.names}
+            if sub_option == "Rate of Change":
+                return self.shift_change(periods, rate=True), " (YoY %)"
+            if sub_option == "Difference":
+                return self.shift_change(periods, rate=False), " (YoY Diff)"
+        return self, ""
+
+    def slice(self, start=None, end=None):
+        lo = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), side="left")
+        hi = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), side="right")
+        return AlignedPanel(
+            self.names, self.dates[lo:hi], self.values[lo:hi], self.freq, self.source_freqs, self.interannual
+        )
+
+    # ------------------ Statistics ------------------
+    def summary_frames(self, observed=None):
+        # One Metric/Value frame per column, computed for all columns at once.
+        # observed: mask of rows each series actually covers (defaults to non-NaN
+        # values); it sets the date bounds and the latest value.
+        valid = ~np.isnan(self.values)
+        observed = valid if observed is None else observed
+        counts = valid.sum(axis=0)
+        has_data = counts > 0
+        safe = np.where(valid, self.values, 0.0)
+        sums = safe.sum(axis=0)
+        means = np.divide(sums, counts, out=np.full(counts.shape, np.nan), where=has_data)
+        sq_dev = np.where(valid, (self.values - means) ** 2, 0.0).sum(axis=0)
+        stds = np.divide(sq_dev, counts - 1, out=np.full(counts.shape, np.nan), where=counts > 1) ** 0.5
+        mins = np.where(valid, self.values, np.inf).min(axis=0, initial=np.inf)
+        maxs = np.where(valid, self.values, -np.inf).max(axis=0, initial=-np.inf)
+        first_rows = observed.argmax(axis=0)
+        last_rows = len(self.values) - 1 - observed[::-1].argmax(axis=0)
+
+        frames = []
+        for i in range(len(self.names)):
+            if not observed[:, i].any():
+                frames.append(pd.DataFrame(columns=["Metric", "Value"]))
+                continue
+            stats = {
+                "Min": mins[i],
+                "Max": maxs[i],
+                "Mean": means[i],
+                "Std Dev": stds[i],
+                "Latest": self.values[last_rows[i], i],
+                "Count": int(counts[i]),
+                "Start Date": self.dates[first_rows[i]].strftime("%Y-%m-%d"),
+                "End Date": self.dates[last_rows[i]].strftime("%Y-%m-%d"),
+            }
+            frames.append(pd.DataFrame([(k, str(v)) for k, v in stats.items()], columns=["Metric", "Value"]))
+        return frames
+
+
+def align_series(combined_data, freqs=None, rules=None, freq=None, default_rule="last"):
+    # Build one aligned matrix for N (name, DataFrame) series in a single pass.
+    #
+    # freqs: {name: source frequency}; rules: {name: "last" | "mean" | "sum"}
+    # used when a series is resampled to a coarser calendar.
+    codes = {name: (f or "").upper() for name, f in (freqs or {}).items()}
+    freqs = {name: normalize_frequency(f) for name, f in codes.items()}
+    rules = rules or {}
+    names = [name for name, _ in combined_data]
+    for name in names:
+        freqs.setdefault(name, "D")
+    target = freq or max((freqs[name] for name in names), key=FREQ_ORDER.get, default="D")
+    # Year-on-year compares observations a year apart: counted on the source
+    # calendar, or on the target one once a series has been resampled
+    interannual = {
+        name: INTERANNUAL_PERIODS[target] if freqs[name] != target
+        else INTERANNUAL_PERIODS.get(codes.get(name), INTERANNUAL_PERIODS[target])
+        for name in names
+    }
+
+    # Concatenate every series once: (series id, date, value)
+    lengths = [len(df) for _, df in combined_data]
+    series_ids = np.repeat(np.arange(len(names)), lengths)
+    dates = np.concatenate([
+        pd.to_datetime(df["TIME_PERIOD"]).to_numpy(dtype="datetime64[ns]") for _, df in combined_data
+    ]) if names else np.array([], dtype="datetime64[ns]")
+    values = np.concatenate([
+        pd.to_numeric(df["OBS_VALUE"], errors="coerce").to_numpy(dtype=float) for _, df in combined_data
+    ]) if names else np.array([], dtype=float)
+
+    keep = ~np.isnan(values) & ~np.isnat(dates)
+    series_ids, dates, values = series_ids[keep], dates[keep], values[keep]
+
+    if len(values) == 0:
+        return AlignedPanel(names, pd.DatetimeIndex([]), np.empty((0, len(names))), target, freqs, interannual)
+
+    ordinals = pd.PeriodIndex(pd.DatetimeIndex(dates), freq=PERIOD_ALIASES[target]).asi8
+
+    if target == "D":
+        # Daily/irregular: rows are the union of observed days
+        row_ordinals, rows = np.unique(ordinals, return_inverse=True)
+        row_dates = row_ordinals.astype("datetime64[D]")
+    else:
+        # Regular calendar: every period between the first and last observation
+        first = ordinals.min()
+        rows = ordinals - first
+        row_dates = pd.period_range(
+            start=pd.Period(ordinal=first, freq=PERIOD_ALIASES[target]), periods=int(rows.max()) + 1
+        ).to_timestamp()
+    n_rows, n_cols = len(row_dates), len(names)
+    cells = rows * n_cols + series_ids
+
+    matrix = np.full(n_rows * n_cols, np.nan)
+    rule_of_series = np.array([rules.get(name, default_rule) for name in names])
+    for rule in np.unique(rule_of_series):
+        if rule not in RESAMPLE_RULES:
+            raise ValueError(f"Unknown resampling rule '{rule}'. Use one of {RESAMPLE_RULES}.")
+        mask = rule_of_series[series_ids] == rule
+        rule_cells, rule_dates, rule_values = cells[mask], dates[mask], values[mask]
+        if rule == "last":
+            order = np.lexsort((rule_dates, rule_cells))
+            sorted_cells = rule_cells[order]
+            is_last = np.append(sorted_cells[1:] != sorted_cells[:-1], True)
+            matrix[sorted_cells[is_last]] = rule_values[order][is_last]
+        else:
+            totals = np.bincount(rule_cells, weights=rule_values, minlength=n_rows * n_cols)
+            counts = np.bincount(rule_cells, minlength=n_rows * n_cols)
+            filled = counts > 0
+            matrix[filled] = totals[filled] / counts[filled] if rule == "mean" else totals[filled]
+
+    return AlignedPanel(names, row_dates, matrix.reshape(n_rows, n_cols), target, freqs, interannual)
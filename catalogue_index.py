@@ -0,0 +1,151 @@
+import bisect
+import heapq
+import re
+
+TOKEN_PATTERN = re.compile(r"[0-9a-z]+")
+
+# Relative weight of a token hit in each field
+FIELD_WEIGHTS = {
+    "label": 4.0,
+    "name": 3.0,
+    "key": 2.5,
+    "title": 2.0,
+    "title_compl": 1.0,
+}
+PREFIX_FACTOR = 0.5  # a prefix hit scores half of an exact token hit
+
+
+def tokenize(text):
+    if text is None:
+        return []
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def key_tokens(key):
+    # Each SDMX key dimension ("ICP", "M", "U2", ...) plus its word pieces
+    tokens = []
+    for dimension in str(key).split("."):
+        dimension = dimension.lower()
+        if dimension:
+            tokens.append(dimension)
+            tokens.extend(tokenize(dimension))
+    return tokens
+
+
+class CatalogueIndex:
+    # Token / prefix index over the series catalogue.
+    #
+    # Built once per catalogue; lookups touch only the postings of the query
+    # tokens, so search cost depends on the hits rather than on the number of
+    # series. Also owns the unique display labels used by the selectors.
+
+    def __init__(self):
+        self.keys = []             # row id -> series key
+        self.labels = []           # row id -> unique display label
+        self.label_to_key = {}
+        self.key_to_label = {}
+        self.key_to_row = {}
+        self._label_counters = {}  # base label -> next suffix to try
+        self._postings = {}        # token -> {row id: score}
+        self._sorted_tokens = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_records(cls, records):
+        # records: iterable of dicts with "key" and optional label/name/title/title_compl
+        index = cls()
+        for record in records:
+            index.add(**record)
+        return index
+
+    def add(self, key, label=None, name=None, title=None, title_compl=None):
+        if key in self.key_to_label:
+            return self.key_to_label[key]
+
+        row = len(self.keys)
+        label = self.unique_label(str(label or key).strip())
+        self.keys.append(key)
+        self.labels.append(label)
+        self.label_to_key[label] = key
+        self.key_to_label[key] = label
+        self.key_to_row[key] = row
+
+        fields = {
+            "label": tokenize(label),
+            "name": tokenize(name),
+            "key": key_tokens(key),
+            "title": tokenize(title),
+            "title_compl": tokenize(title_compl),
+        }
+        for field, tokens in fields.items():
+            weight = FIELD_WEIGHTS[field]
+            for token in tokens:
+                postings = self._postings.setdefault(token, {})
+                if postings.get(row, 0.0) < weight:
+                    postings[row] = weight
+        self._sorted_tokens = None
+        return label
+
+    def unique_label(self, label):
+        # "X", "X (2)", "X (3)", ... without rescanning earlier suffixes
+        if label not in self.label_to_key:
+            return label
+        counter = self._label_counters.get(label, 2)
+        candidate = f"{label} ({counter})"
+        while candidate in self.label_to_key:
+            counter += 1
+            candidate = f"{label} ({counter})"
+        self._label_counters[label] = counter + 1
+        return candidate
+
+    # ------------------ Lookups ------------------
+    def _token_hits(self, token):
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self._postings)
+
+        hits = dict(self._postings.get(token, {}))
+        start = bisect.bisect_left(self._sorted_tokens, token)
+        stop = bisect.bisect_left(self._sorted_tokens, token + "\uffff")
+        for candidate in self._sorted_tokens[start:stop]:
+            if candidate == token:
+                continue
+            for row, weight in self._postings[candidate].items():
+                score = weight * PREFIX_FACTOR
+                if hits.get(row, 0.0) < score:
+                    hits[row] = score
+        return hits
+
+    def search(self, query, limit=50):
+        # Ranked rows matching every query token (exactly or as a prefix)
+        query = (query or "").strip()
+        if not query:
+            return list(range(min(limit, len(self.keys))))
+
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        scores = None
+        for token in sorted(set(tokens), key=len, reverse=True):
+            hits = self._token_hits(token)
+            if scores is None:
+                scores = hits
+            else:
+                scores = {row: score + hits[row] for row, score in scores.items() if row in hits}
+            if not scores:
+                return []
+
+        # An exact key match always comes first
+        exact_row = self.key_to_row.get(query)
+        ranked = heapq.nsmallest(limit, scores, key=lambda row: (-scores[row], row))
+        if exact_row is not None:
+            ranked = [exact_row] + [row for row in ranked if row != exact_row][:limit - 1]
+        return ranked
+
+    def search_labels(self, query, limit=50):
+        return [self.labels[row] for row in self.search(query, limit)]
+
+    def search_keys(self, query, limit=50):
+        return [self.keys[row] for row in self.search(query, limit)]
@@ -0,0 +1,265 @@
+import threading
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from alignment import FREQ_ORDER, align_series, normalize_frequency
+from data_manipulation import DataManipulation
+
+# transform name -> (view_option, sub_option) understood by AlignedPanel.transform
+TRANSFORMS = {
+    "level": ("Original Data", None),
+    "pop_pct": ("Period-on-Period", "Rate of Change"),
+    "pop_diff": ("Period-on-Period", "Difference"),
+    "yoy_pct": ("Interannual", "Rate of Change"),
+    "yoy_diff": ("Interannual", "Difference"),
+}
+CACHE_SIZE = 64
+
+
+def column_means(X):
+    # nanmean per column; all-NaN columns get 0 instead of a warning
+    if X.size == 0:
+        return np.zeros(X.shape[1:])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        means = np.nanmean(X, axis=0)
+    return np.nan_to_num(means)
+
+
+def masked_correlation(X, Y, min_periods=12):
+    # Pairwise-complete Pearson correlation of every column of X (T x N) with
+    # every column of Y (T x M), NaN-aware, as a handful of matrix products.
+    mx, my = ~np.isnan(X), ~np.isnan(Y)
+    # Centre first so the sum-of-products formulas don't lose precision
+    X, Y = X - column_means(X), Y - column_means(Y)
+    X0, Y0 = np.where(mx, X, 0.0), np.where(my, Y, 0.0)
+    fx, fy = mx.astype(float), my.astype(float)
+
+    n = fx.T @ fy
+    sx = X0.T @ fy
+    sy = fx.T @ Y0
+    sxx = (X0 ** 2).T @ fy
+    syy = fx.T @ (Y0 ** 2)
+    sxy = X0.T @ Y0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx ** 2 / n
+        var_y = syy - sy ** 2 / n
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[(n < min_periods) | ~np.isfinite(corr)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def shift_rows(X, lag):
+    # X shifted down by lag rows (positive lag: value from lag periods earlier)
+    shifted = np.full_like(X, np.nan)
+    if lag == 0:
+        shifted[:] = X
+    elif abs(lag) < len(X):
+        if lag > 0:
+            shifted[lag:] = X[:-lag]
+        else:
+            shifted[:lag] = X[-lag:]
+    return shifted
+
+
+def rolling_moments(x, Y, window, min_periods):
+    # Windowed cov(x, Y[:, j]), var(x), var(Y[:, j]) over pairwise-valid rows
+    mask = ~np.isnan(Y) & ~np.isnan(x)[:, None]
+    x = x - column_means(x[:, None])[0]
+    Y = Y - column_means(Y)
+    x0 = np.where(mask, x[:, None], 0.0)
+    y0 = np.where(mask, Y, 0.0)
+
+    def window_sum(a):
+        c = np.cumsum(np.vstack([np.zeros((1, a.shape[1])), a]), axis=0)
+        return c[window:] - c[:-window] if len(a) >= window else np.empty((0, a.shape[1]))
+
+    n = window_sum(mask.astype(float))
+    sx, sy = window_sum(x0), window_sum(y0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = window_sum(x0 * y0) - sx * sy / n
+        var_x = window_sum(x0 ** 2) - sx ** 2 / n
+        var_y = window_sum(y0 ** 2) - sy ** 2 / n
+    too_few = n < min_periods
+    for a in (cov, var_x, var_y):
+        a[too_few] = np.nan
+    return cov, var_x, var_y
+
+
+class CrossSeriesAnalytics(DataManipulation):
+    # Batched cross-series analytics on aligned data.
+    #
+    # Every method works on one aligned matrix for all requested series, so
+    # screening hundreds of series costs a few matrix products rather than a
+    # pandas call per pair. Results are cached per data version.
+
+    def __init__(self, data_dict, metadata=None, versions=None):
+        super().__init__(data_dict)
+        self.metadata = metadata  # MetadataCatalogue, for source frequencies
+        self.versions = versions if versions is not None else {}  # key -> fetch counter
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ------------------ Caching ------------------
+    def _cached(self, name, keys, params, compute):
+        version = tuple(self.versions.get(key, 0) for key in keys)
+        cache_key = (name, tuple(keys), params, version)
+        with self._lock:
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                return self._cache[cache_key]
+        result = compute()
+        with self._lock:
+            self._cache[cache_key] = result
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return result
+
+    # ------------------ Alignment ------------------
+    def available_keys(self, keys=None):
+        # Keys whose frames hold observations, read from the catalogue so no spilled frame is reloaded
+        keys = list(self.data_dict) if keys is None else keys
+        return [key for key in keys if key in self.data_dict and self.has_observations(key)]
+
+    def has_observations(self, key):
+        observed = self.metadata.observed(key) if self.metadata is not None else None
+        if observed is None:
+            return {"TIME_PERIOD", "OBS_VALUE"} <= set(self.data_dict[key].columns)
+        return observed
+
+    def frequency(self, key):
+        if self.metadata is None:
+            return "D"
+        return normalize_frequency(self.metadata.field(key, "frequency"))
+
+    def aligned_matrix(self, keys, transform="pop_pct", freq=None, rule="last"):
+        # Cached on the requested keys, so a hit touches neither the catalogue nor the frames
+        keys = list(keys)
+
+        def compute():
+            available = self.available_keys(keys)
+            freqs = {}
+            if self.metadata is not None:
+                freqs = {key: self.metadata.field(key, "frequency") for key in available}
+            panel = align_series(
+                [(key, self.data_dict[key]) for key in available],
+                freqs=freqs, rules={key: rule for key in available}, freq=freq
+            )
+            view_option, sub_option = TRANSFORMS[transform]
+            return panel.transform(view_option, sub_option)[0]
+
+        return self._cached("aligned", keys, (transform, freq, rule), compute)
+
+    # ------------------ Analytics ------------------
+    def correlation_matrix(self, keys, transform="pop_pct", freq=None, min_periods=12):
+        panel = self.aligned_matrix(keys, transform, freq)
+
+        def compute():
+            corr = masked_correlation(panel.values, panel.values, min_periods)
+            return pd.DataFrame(corr, index=panel.names, columns=panel.names)
+
+        return self._cached("corr", panel.names, (transform, freq, min_periods), compute)
+
+    def lead_lag(self, target, keys, max_lag=12, transform="pop_pct", freq=None, min_periods=12):
+        # corr(target_t, series_{t-lag}) for lag in [-max_lag, max_lag];
+        # a positive best lag means the series leads the target.
+        keys = [target] + [key for key in keys if key != target]
+        panel = self.aligned_matrix(keys, transform, freq)
+        if not panel.names or panel.names[0] != target:
+            return pd.DataFrame(columns=list(range(-max_lag, max_lag + 1)), dtype=float)
+
+        def compute():
+            y = panel.values[:, :1]
+            lags = list(range(-max_lag, max_lag + 1))
+            table = np.column_stack([
+                masked_correlation(shift_rows(panel.values, lag), y, min_periods)[:, 0] for lag in lags
+            ])
+            return pd.DataFrame(table, index=panel.names, columns=lags)
+
+        return self._cached("lead_lag", keys, (max_lag, transform, freq, min_periods), compute)
+
+    def lead_lag_matrix(self, keys, max_lag=12, transform="pop_pct", freq=None, min_periods=12):
+        # All pairs at every lag: array[lag_index, i, j] = corr(x_j,t , x_i,t-lag)
+        panel = self.aligned_matrix(keys, transform, freq)
+
+        def compute():
+            lags = list(range(-max_lag, max_lag + 1))
+            cube = np.stack([
+                masked_correlation(shift_rows(panel.values, lag), panel.values, min_periods) for lag in lags
+            ])
+            return lags, panel.names, cube
+
+        return self._cached("lead_lag_matrix", panel.names, (max_lag, transform, freq, min_periods), compute)
+
+    def screen(self, target, keys=None, max_lag=12, transform="pop_pct", freq=None, min_periods=12, top=20):
+        # Strongest relationships between target and the catalogue, best lag per series.
+        # Without freq, each series is paired with the target on the coarser of
+        # their two frequencies (one aligned matrix per catalogue frequency), so
+        # lags count periods of that calendar.
+        # Sorted: the cache iterates in LRU order, which would change the cache keys below
+        keys = sorted(self.data_dict, key=str) if keys is None else list(keys)
+        keys = [key for key in keys if key != target]
+        if freq is None:
+            target_order = FREQ_ORDER[self.frequency(target)]
+            groups = {}
+            for key in keys:
+                pair = max(FREQ_ORDER[self.frequency(key)], target_order)
+                groups.setdefault(pair, []).append(key)
+            by_freq = {name: groups[order] for name, order in FREQ_ORDER.items() if order in groups}
+        else:
+            by_freq = {freq: keys}
+
+        tables = []
+        for group_freq, group in by_freq.items():
+            table = self.lead_lag(target, group, max_lag, transform, group_freq, min_periods)
+            table = table.drop(index=target, errors="ignore").dropna(how="all")
+            if not table.empty:
+                tables.append((group_freq, table))
+        if not tables:
+            return pd.DataFrame(columns=["Series", "Frequency", "Best Lag", "Correlation", "Contemporaneous"])
+
+        results = []
+        for group_freq, table in tables:
+            values = table.to_numpy()
+            best = np.nanargmax(np.abs(np.where(np.isnan(values), 0.0, values)), axis=1)
+            results.append(pd.DataFrame({
+                "Series": table.index,
+                "Frequency": group_freq,
+                "Best Lag": table.columns.to_numpy()[best],
+                "Correlation": values[np.arange(len(values)), best],
+                "Contemporaneous": table[0].to_numpy(),
+            }))
+        result = pd.concat(results, ignore_index=True)
+        order = np.argsort(-np.abs(result["Correlation"].to_numpy()), kind="stable")
+        return result.iloc[order[:top]].reset_index(drop=True)
+
+    def rolling_correlation(self, target, keys, window=36, transform="pop_pct", freq=None, min_periods=None):
+        return self._rolling("rolling_corr", target, keys, window, transform, freq, min_periods)
+
+    def rolling_beta(self, target, keys, window=36, transform="pop_pct", freq=None, min_periods=None):
+        # Beta of each series on the target: cov(series, target) / var(target)
+        return self._rolling("rolling_beta", target, keys, window, transform, freq, min_periods)
+
+    def _rolling(self, name, target, keys, window, transform, freq, min_periods):
+        keys = [target] + [key for key in keys if key != target]
+        panel = self.aligned_matrix(keys, transform, freq)
+        if not panel.names or panel.names[0] != target:
+            return pd.DataFrame(dtype=float)
+        # Default: two thirds of the window must hold a valid pair
+        min_periods = max(3, (2 * window) // 3) if min_periods is None else min_periods
+
+        def compute():
+            cov, var_x, var_y = rolling_moments(panel.values[:, 0], panel.values[:, 1:], window, min_periods)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result = cov / np.sqrt(var_x * var_y) if name == "rolling_corr" else cov / var_x
+            frame = pd.DataFrame(np.nan, index=panel.dates, columns=panel.names[1:])
+            if len(result):
+                frame.iloc[window - 1:] = result
+            return frame
+
+        return self._cached(name, keys, (window, transform, freq, min_periods), compute)
@@ -1,15 +1,32 @@
 import pickle
 import pandas as pd
 import os
-from ecbdata import ecbdata
+from collections import ChainMap
+from single_flight import SingleFlight
+from sdmx_batch import default_fetcher
+from metadata_catalogue import MetadataCatalogue
+from summary_stats import SummaryStatsStore
+from series_cache import SeriesCache, DEFAULT_BUDGET_BYTES
+
+# Shared by every DataRetrieval in the process so concurrent sessions
+# asking for the same key share one download.
+ecb_flight = SingleFlight("ecb")
+
+METADATA_FRAME = "__metadata__"  # Catalogue table published next to the series
 
 
 class DataRetrieval:
-    def __init__(self, pickle_file_path):
+    def __init__(self, pickle_file_path, memory_budget=DEFAULT_BUDGET_BYTES, vintages=None):
         self.pickle_file_path = pickle_file_path
-        self.DICT_data = {}  # Retrieved ECB series
+        self.DICT_data = SeriesCache(memory_budget)  # Retrieved ECB series, LRU-spilled to disk past the budget
         self.key_name_mapping = {}  # For sidebar name display
+        self.name_key_mapping = {}  # Reverse of key_name_mapping, built once
         self.raw_data = None  # Full reference table from pickle
+        self.metadata = MetadataCatalogue()  # Per-series titles, units, ... extracted at fetch time
+        # Block summaries kept up to date on every fetch; partial blocks are read back from the cache
+        self.summary_stats = SummaryStatsStore(source=self.DICT_data.peek)
+        self.series_versions = {}  # key -> counter bumped whenever the series is replaced
+        self.vintages = vintages  # Optional VintageStore keeping every fetched revision
         self.load_pickle_data()
 
     def load_pickle_data(self):
@@ -42,22 +59,122 @@ class DataRetrieval:
 
     def create_key_name_mapping(self, df):
         self.key_name_mapping = dict(zip(df["KEY"], df["Name"]))
+        self.name_key_mapping = {v: k for k, v in self.key_name_mapping.items()}
         print("✅ Key-name mapping created successfully.")
 
-    def fetch_data(self, ST_key, start_date=None):
+    def fetch_data(self, ST_key, start_date=None, fetcher=None):
         try:
-            print(f"🌍 Fetching data from ECB for key: {ST_key}")
-            df = ecbdata.get_series(ST_key, start=start_date)
-            df["TIME_PERIOD"] = pd.to_datetime(df["TIME_PERIOD"], errors='coerce')
-            df.dropna(subset=["TIME_PERIOD"], inplace=True)
-            self.DICT_data[ST_key] = df
+            df = ecb_flight.do((ST_key, start_date), lambda: self.download_series(ST_key, start_date, fetcher))
+            self.store_series(ST_key, df)
             print(f"✅ Data fetched for key: {ST_key}")
         except Exception as e:
             print(f"❌ Error fetching data for key {ST_key}: {e}")
 
+    def fetch_many(self, keys, start_date=None, fetcher=None):
+        # Batched multi-series queries; keys the batch could not return are fetched one by one
+        keys = list(dict.fromkeys(keys))
+        fetcher = fetcher or default_fetcher
+        try:
+            frames = ecb_flight.do(
+                ("batch", tuple(keys), start_date),
+                lambda: {key: self.clean_series(df) for key, df in fetcher.fetch(keys, start_date).items()}
+            )
+        except Exception as e:
+            print(f"❌ Batched fetch failed: {e}")
+            frames = {}
+
+        for key in keys:
+            if key in frames:
+                self.store_series(key, frames[key])
+            else:
+                self.fetch_data(key, start_date, fetcher)
+        print(f"✅ Data fetched for {len(frames)} of {len(keys)} keys in batched requests.")
+
+    def store_series(self, ST_key, df):
+        self.DICT_data[ST_key] = df
+        self.series_versions[ST_key] = self.series_versions.get(ST_key, 0) + 1
+        self.metadata.register(ST_key, df)
+        self.update_summary_stats(ST_key, df)
+        if self.vintages is not None:
+            try:
+                self.vintages.record(ST_key, df)
+            except Exception as e:
+                print(f"❌ Could not record vintage for key {ST_key}: {e}")
+
+    def drop_series(self, ST_key):
+        if ST_key in self.DICT_data:
+            del self.DICT_data[ST_key]
+        self.series_versions[ST_key] = self.series_versions.get(ST_key, 0) + 1
+        self.metadata.remove(ST_key)
+        self.summary_stats.remove(ST_key)
+
+    @staticmethod
+    def download_series(ST_key, start_date=None, fetcher=None):
+        # One-key query over the shared pooled session (keep-alive, gzip, retries)
+        print(f"🌍 Fetching data from ECB for key: {ST_key}")
+        frames = (fetcher or default_fetcher).fetch([ST_key], start_date)
+        if ST_key not in frames:
+            raise LookupError(f"the ECB API returned no series for {ST_key}")
+        return DataRetrieval.clean_series(frames[ST_key])
+
+    @staticmethod
+    def clean_series(df):
+        df["TIME_PERIOD"] = pd.to_datetime(df["TIME_PERIOD"], errors='coerce')
+        df.dropna(subset=["TIME_PERIOD"], inplace=True)
+        return df
+
+    def update_summary_stats(self, ST_key, df):
+        if "OBS_VALUE" in df.columns and "TIME_PERIOD" in df.columns:
+            self.summary_stats.update(ST_key, df["TIME_PERIOD"], df["OBS_VALUE"])
+
+    def publish_series(self, store, requested_keys, namespace="ecb"):
+        # Share the fetched series with every other session / worker process.
+        # The view reads spilled frames one at a time without reloading them into the cache.
+        frames = ChainMap({METADATA_FRAME: self.metadata.to_frame().reset_index()}, self.DICT_data.view())
+        return store.publish(namespace, frames, extra={"requested_keys": list(requested_keys)})
+
+    def attach_store(self, store, requested_keys, namespace="ecb", max_age=None):
+        # Read series from the shared store instead of fetching them again
+        manifest = store.manifest(namespace)
+        if manifest is None or not set(requested_keys) <= set(manifest["extra"].get("requested_keys", [])):
+            return False
+        frames = store.load(namespace, max_age=max_age)
+        if frames is None:
+            return False
+        series = {key: df for key, df in frames.items() if key != METADATA_FRAME}
+        for key, df in series.items():
+            self.DICT_data.put(key, df, shared=True)  # memory-mapped, counted but never spilled
+            self.series_versions[key] = self.series_versions.get(key, 0) + 1
+            self.update_summary_stats(key, df)
+        if METADATA_FRAME in frames:
+            self.metadata.load_frame(frames[METADATA_FRAME])
+        else:
+            for key, df in series.items():
+                self.metadata.register(key, df)
+        print(f"✅ Attached {len(series)} series from shared store '{namespace}'.")
+        return True
+
+    def series_as_of(self, ST_key, when):
+        # Observations as known at `when`, with the series attributes of the current frame
+        if self.vintages is None:
+            return None
+        snapshot = self.vintages.as_of(ST_key, when)
+        current = self.DICT_data.get(ST_key)
+        if snapshot is None or current is None:
+            return snapshot
+        for col in current.columns:
+            if col not in snapshot.columns and len(current) and current[col].nunique(dropna=False) == 1:
+                snapshot[col] = current[col].iloc[0]
+        return snapshot[[col for col in current.columns if col in snapshot.columns]]
+
+    def memory_report(self):
+        # Bytes held per series and whether it is resident, shared or spilled
+        report = self.DICT_data.memory_report()
+        report.insert(1, "Name", report["Key"].map(self.key_name_mapping))
+        return report
+
     def get_name_from_key(self, key):
         return self.key_name_mapping.get(key, "❓ Unknown")
 
     def get_key_from_name(self, name):
-        reverse_map = {v: k for k, v in self.key_name_mapping.items()}
-        return reverse_map.get(name, None)
+        return self.name_key_mapping.get(name, None)
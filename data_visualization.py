@@ -1,10 +1,14 @@
 import plotly.graph_objects as go
 import pandas as pd
+import numpy as np
 from pandas.tseries.frequencies import to_offset
+from alignment import align_series
 
 class DataVisualization:
-    def __init__(self, df_dict):
+    def __init__(self, df_dict, metadata=None, stats_store=None):
         self.df_dict = df_dict
+        self.metadata = metadata  # MetadataCatalogue filled at fetch time
+        self.stats_store = stats_store  # SummaryStatsStore for untransformed series
 
     @staticmethod
     def infer_frequency(df):
@@ -26,9 +30,25 @@ class DataVisualization:
         return "unknown"
 
     @staticmethod
-    def describe_metadata_markdown(df):
+    def describe_metadata_markdown(df, metadata=None):
         lines = []
-        if df is not None and isinstance(df, pd.DataFrame):
+        if metadata is not None:
+            # Catalogue record extracted once at fetch time
+            metadata_fields = {
+                "Complete Title": metadata.get("title_compl"),
+                "Title (EN)": metadata.get("title_en"),
+                "Title (Original)": metadata.get("title_original"),
+                "Frequency": metadata.get("frequency"),
+                "Reference Area": metadata.get("ref_area"),
+                "Adjustment": metadata.get("adjustment"),
+                "Unit of Measure": metadata.get("unit") or metadata.get("unit_descr"),
+                "Source": metadata.get("source"),
+                "Observation Status": metadata.get("status"),
+            }
+            for label, value in metadata_fields.items():
+                if value and value != "Not available":
+                    lines.append(f"- **{label}:** {value}")
+        elif df is not None and isinstance(df, pd.DataFrame):
             df = df.copy()
             df.dropna(axis=1, how="all", inplace=True)
 
@@ -80,6 +100,12 @@ class DataVisualization:
             columns=["Metric", "Value"]
         )
 
+    def series_unit(self, name, df, series_keys):
+        key = series_keys.get(name)
+        if key is not None and self.metadata is not None:
+            return self.metadata.field(key, "unit", "")
+        return df["UNIT"].dropna().unique()[0] if "UNIT" in df.columns and not df["UNIT"].dropna().empty else ""
+
     def assign_colors_and_axes(self, dataset_names, units):
         colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2']
         axis_assignments = {}
@@ -91,54 +117,53 @@ class DataVisualization:
 
         return color_map, axis_assignments
 
+    def series_frequency(self, name, df, series_keys):
+        key = series_keys.get(name)
+        if key is not None and self.metadata is not None and self.metadata.field(key, "frequency"):
+            return self.metadata.field(key, "frequency")
+        return self.infer_frequency(df)
+
     def compare_datasets_chart(
         self, combined_data, view_option, chart_title,
         sub_option=None, y_axis_label=None, x_axis_label="Date",
-        chart_height=500, chart_type="line", log_scale=False
+        chart_height=500, chart_type="line", log_scale=False, series_keys=None,
+        resample_rule="last"
     ):
-        fig = go.Figure()
-        table_data = []
-        units = {}
-        datasets = [name for name, _ in combined_data]
+        frames = {name: df for name, df in combined_data if "OBS_VALUE" in df.columns}
+
+        # All series on one calendar; transforms and stats run on the matrix
+        panel = self.align_frames(frames, series_keys, resample_rule)
+        transformed, suffix = panel.transform(view_option, sub_option)
+        fig, color_map, axis_map = self.panel_figure(
+            transformed, suffix, frames, chart_title, view_option, sub_option,
+            y_axis_label, x_axis_label, chart_height, chart_type, series_keys
+        )
+        table_data = self.panel_tables(panel, transformed, suffix, frames, view_option, series_keys)
+        return fig, table_data, color_map, axis_map
 
-        for name, df in combined_data:
-            unit = df["UNIT"].dropna().unique()[0] if "UNIT" in df.columns and not df["UNIT"].dropna().empty else ""
-            units[name] = unit
+    # The stages below let callers recompute only what a control changed:
+    # alignment (selection, resampling) -> transform -> slice -> figure / tables.
+    def align_frames(self, frames, series_keys=None, resample_rule="last"):
+        series_keys = series_keys or {}
+        return align_series(
+            list(frames.items()),
+            freqs={name: self.series_frequency(name, df, series_keys) for name, df in frames.items()},
+            rules={name: resample_rule for name in frames}
+        )
 
+    def panel_figure(
+        self, transformed, suffix, frames, chart_title, view_option, sub_option=None,
+        y_axis_label=None, x_axis_label="Date", chart_height=500, chart_type="line", series_keys=None
+    ):
+        fig = go.Figure()
+        series_keys = series_keys or {}
+        datasets = list(frames)
+        units = {name: self.series_unit(name, df, series_keys) for name, df in frames.items()}
         color_map, axis_map = self.assign_colors_and_axes(datasets, units)
 
-        for idx, (original_name, data_df) in enumerate(combined_data):
-            dataset_name = original_name
-
-            data_df = pd.DataFrame(data_df).sort_values(by="TIME_PERIOD")
-            data_df["TIME_PERIOD"] = pd.to_datetime(data_df["TIME_PERIOD"])
-            data_df.set_index("TIME_PERIOD", inplace=True)
-            data_df = data_df.copy()
-
-            if "OBS_VALUE" not in data_df.columns:
-                continue
-
-            y_values = data_df["OBS_VALUE"]
-
-            if view_option == "Period-on-Period":
-                if sub_option == "Rate of Change":
-                    y_values = y_values.pct_change() * 100
-                    dataset_name += " (% Change)"
-                elif sub_option == "Difference":
-                    y_values = y_values.diff()
-                    dataset_name += " (Diff)"
-
-            elif view_option == "Interannual":
-                freq = self.infer_frequency(data_df.reset_index())
-                periods = 12 if freq == "M" else 4 if freq == "Q" else 1
-                if sub_option == "Rate of Change":
-                    y_values = y_values.pct_change(periods=periods) * 100
-                    dataset_name += " (YoY %)"
-                elif sub_option == "Difference":
-                    y_values = y_values.diff(periods=periods)
-                    dataset_name += " (YoY Diff)"
-
-            data_df["OBS_VALUE"] = y_values
+        for idx, original_name in enumerate(transformed.names):
+            dataset_name = original_name + suffix
+            y_values = transformed.values[:, idx]
 
             if "(" in dataset_name and ")" in dataset_name:
                 main_title = dataset_name.split("(", 1)[0].strip()
@@ -151,11 +176,12 @@ class DataVisualization:
             color = color_map[original_name]
 
             trace_args = dict(
-                x=data_df.index,
-                y=data_df["OBS_VALUE"],
+                x=transformed.dates,
+                y=y_values,
                 name=trace_label,
                 marker=dict(color=color),
-                yaxis=y_axis_side
+                yaxis=y_axis_side,
+                connectgaps=True
             )
 
             if chart_type == "line":
@@ -163,29 +189,24 @@ class DataVisualization:
             elif chart_type == "area":
                 fig.add_trace(go.Scatter(mode='lines', fill='tozeroy', **trace_args))
             elif chart_type == "bar":
+                trace_args.pop("connectgaps")
                 fig.add_trace(go.Bar(**trace_args))
             elif chart_type == "scatter":
                 fig.add_trace(go.Scatter(mode='markers', **trace_args))
 
-            stats_df = self.generate_summary_stats(data_df)
-
-            if view_option in ["Period-on-Period", "Interannual"]:
-                cleaned_df = data_df.reset_index()[["TIME_PERIOD", "OBS_VALUE"]].dropna()
-                value_label = dataset_name.split("<")[0].strip()
-                cleaned_df.columns = ["Date", value_label]
-            else:
-                cleaned_df = data_df.reset_index()
-
-            table_data.append((dataset_name, cleaned_df, original_name, cleaned_df, stats_df))
-
         # ✅ Updated Y-axis label logic
         if y_axis_label is None:
             if view_option in ["Period-on-Period", "Interannual"] and sub_option == "Rate of Change":
                 y_axis_label = "% Change"
             elif view_option in ["Period-on-Period", "Interannual"] and sub_option == "Difference":
                 y_axis_label = "Difference"
+            elif not datasets:
+                y_axis_label = "Value"
+            elif datasets[0] in series_keys and self.metadata is not None:
+                key = series_keys[datasets[0]]
+                y_axis_label = self.metadata.field(key, "unit") or self.metadata.field(key, "unit_descr") or "Value"
             else:
-                first_df = combined_data[0][1]
+                first_df = frames[datasets[0]]
                 if "UNIT" in first_df.columns:
                     unit_col = first_df["UNIT"].dropna().astype(str).str.strip().unique()
                     if len(unit_col) > 0 and unit_col[0]:
@@ -234,4 +255,97 @@ class DataVisualization:
             paper_bgcolor='#f0f7ff'
         )
 
-        return fig, table_data, color_map, axis_map
+        return fig, color_map, axis_map
+
+    def panel_tables(
+        self, panel, transformed, suffix, frames, view_option, series_keys=None, start=None, end=None, as_of=None,
+        tables=True, stats=True
+    ):
+        # [(dataset_name, table, original_name, table, stats_df)] for panels already
+        # sliced to [start, end]; the raw frames are cut to the same range. Only
+        # the parts asked for are built, the others are None. With as_of the
+        # frames are past vintages, so the stats store (which follows the latest
+        # fetch) is not used.
+        series_keys = series_keys or {}
+        raw_view = view_option == "Original Data"
+        stats_frames = {}
+        if stats:
+            for name in transformed.names:
+                key = series_keys.get(name)
+                if raw_view and not panel.resampled(name) and as_of is None and self.stats_store is not None \
+                        and key in self.stats_store:
+                    # Range query over precomputed block summaries
+                    stats_frames[name] = self.stats_store.summary_frame(key, start, end)
+            fallback = [name for name in transformed.names if stats_frames.get(name) is None]
+            if fallback:
+                observed = ~np.isnan(panel.select(fallback).values)
+                stats_frames.update(zip(fallback, transformed.select(fallback).summary_frames(observed=observed)))
+
+        table_data = []
+        for idx, original_name in enumerate(transformed.names):
+            dataset_name = original_name + suffix
+            cleaned_df = None
+            if tables and (view_option in ["Period-on-Period", "Interannual"] or panel.resampled(original_name)):
+                value_label = dataset_name.split("<")[0].strip()
+                y_values = transformed.values[:, idx]
+                cleaned_df = pd.DataFrame({"Date": transformed.dates, value_label: y_values}).dropna()
+            elif tables:
+                cleaned_df = self.frame_range(frames[original_name], start, end)
+            table_data.append((dataset_name, cleaned_df, original_name, cleaned_df, stats_frames.get(original_name)))
+
+        return table_data
+
+    @staticmethod
+    def frame_range(frame, start=None, end=None):
+        # Rows of a raw series frame dated in [start, end], in date order. Cached
+        # frames are parsed and sorted already, so this is two binary searches.
+        dates = frame["TIME_PERIOD"]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates)
+        if not dates.is_monotonic_increasing:
+            order = np.argsort(dates.to_numpy(), kind="stable")
+            frame, dates = frame.iloc[order], dates.iloc[order]
+        lo = 0 if start is None else dates.searchsorted(pd.Timestamp(start), side="left")
+        hi = len(dates) if end is None else dates.searchsorted(pd.Timestamp(end), side="right")
+        return frame.iloc[lo:hi].reset_index(drop=True)
+
+    @staticmethod
+    def correlation_heatmap(corr, chart_title, chart_height=500):
+        fig = go.Figure(go.Heatmap(
+            z=corr.to_numpy(),
+            x=list(corr.columns),
+            y=list(corr.index),
+            zmin=-1,
+            zmax=1,
+            colorscale="RdBu",
+            text=corr.round(2).to_numpy(),
+            texttemplate="%{text}",
+            hovertemplate="%{y}<br>%{x}<br>Correlation: %{z:.3f}<extra></extra>"
+        ))
+        fig.update_layout(
+            title=dict(text=chart_title, x=0.5, xanchor='center', font=dict(size=16)),
+            height=chart_height,
+            xaxis=dict(showticklabels=False),
+            margin=dict(l=30, r=30, t=50, b=30),
+            plot_bgcolor='#f0f7ff',
+            paper_bgcolor='#f0f7ff'
+        )
+        return fig
+
+    @staticmethod
+    def rolling_chart(frame, chart_title, y_axis_label, chart_height=400):
+        fig = go.Figure()
+        for name in frame.columns:
+            fig.add_trace(go.Scatter(x=frame.index, y=frame[name], mode='lines', name=f"<b>{name}</b>"))
+        fig.update_layout(
+            title=dict(text=chart_title, x=0.5, xanchor='center', font=dict(size=16)),
+            height=chart_height,
+            xaxis=dict(title="Date"),
+            yaxis=dict(title=y_axis_label, showgrid=True),
+            legend=dict(orientation="h", x=0.5, xanchor="center", y=-0.2, title_text="", font=dict(size=11)),
+            margin=dict(l=30, r=30, t=50, b=60),
+            hovermode="x unified",
+            plot_bgcolor='#f0f7ff',
+            paper_bgcolor='#f0f7ff'
+        )
+        return fig
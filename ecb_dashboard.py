@@ -1,32 +1,69 @@
+import threading
+from collections import OrderedDict
 import streamlit as st
 import pandas as pd
 from data_retrieval import DataRetrieval
 from data_visualization import DataVisualization
+from series_store import shared_store
+from vintage_store import vintage_store
+from catalogue_index import CatalogueIndex
+from alignment import RESAMPLE_RULES, normalize_frequency
+from cross_series import CrossSeriesAnalytics
+
+STORE_MAX_AGE = 6 * 3600  # seconds before shared series are refetched
+SELECTOR_LIMIT = 200  # options shown per selector; the search box narrows the rest
+RELATIONSHIP_TRANSFORMS = {
+    "Period-on-Period %": "pop_pct",
+    "Interannual %": "yoy_pct",
+    "Levels": "level",
+}
+VIEW_OPTIONS = ["Original Data", "Period-on-Period", "Interannual"]
+CHART_TYPES = ["Line", "Bar", "Scatter", "Area"]
+SECTIONS = ["📈 Chart", "📋 Table", "ⓘ Description", "📊 Summary Stats", "🔗 Relationships"]
+MEMO_SIZE = 64  # aligned / transformed panels kept per process
 
 class Dashboard:
     def __init__(self, pickle_file_path):
-        self.data_retrieval = DataRetrieval(pickle_file_path)
+        self.data_retrieval = DataRetrieval(pickle_file_path, vintages=vintage_store)
         self.raw_df = self.data_retrieval.raw_data
-        self.visualization = DataVisualization(self.data_retrieval.DICT_data)
-        self.table_data = []
+        self.visualization = DataVisualization(
+            self.data_retrieval.DICT_data, self.data_retrieval.metadata, self.data_retrieval.summary_stats
+        )
+        self.analytics = CrossSeriesAnalytics(
+            self.data_retrieval.DICT_data, self.data_retrieval.metadata, self.data_retrieval.series_versions
+        )
 
         self.series_name_map = {}
         self.series_key_map = {}
         self.title_compl_map = {}
+        self.catalogue_index = CatalogueIndex()
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
 
         self.build_series_name_map()
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        # One Dashboard serves every session (st.cache_resource): per-run state stays in locals
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"Dashboard is shared across sessions; cannot set '{name}'")
+        super().__setattr__(name, value)
 
     def build_series_name_map(self):
         total_keys = list(self.raw_df["KEY"].dropna().unique())
         title_to_details = {}
 
+        if not self.data_retrieval.attach_store(shared_store, total_keys, max_age=STORE_MAX_AGE):
+            self.data_retrieval.fetch_many(total_keys)
+            if self.data_retrieval.DICT_data:
+                self.data_retrieval.publish_series(shared_store, total_keys)
+
         for key in total_keys:
             try:
-                self.data_retrieval.fetch_data(key)
                 df = self.data_retrieval.DICT_data.get(key)
                 if isinstance(df, pd.DataFrame) and not df.empty:
-                    title = self.get_title_from_data(df).strip()
-                    title_compl = self.get_title_compl(df).strip() if self.get_title_compl(df) else ""
+                    title = self.get_title(key)
+                    title_compl = self.get_title_compl(key) or ""
 
                     if title not in title_to_details:
                         title_to_details[title] = []
@@ -35,40 +72,50 @@ class Dashboard:
                 continue
 
         for title, entries in title_to_details.items():
-            if len(entries) == 1:
-                key, _ = entries[0]
-                self.series_name_map[title] = key
-                self.series_key_map[key] = title
-                self.title_compl_map[key] = self.get_title_compl(self.data_retrieval.DICT_data[key])
-            else:
-                for key, compl in entries:
+            for key, compl in entries:
+                if len(entries) == 1:
+                    label = title
+                else:
                     difference = compl.replace(title, "").strip(" -–:()")
                     label = f"{title} ({difference})" if difference else f"{title}"
-                    self.series_name_map[label] = key
-                    self.series_key_map[key] = label
-                    self.title_compl_map[key] = compl
-
-    def get_title_from_data(self, df):
-        for col in ["TITLE", "TITLE_EN", "Series_title"]:
-            if col in df.columns:
-                val = df[col].dropna().unique()
-                if len(val) > 0:
-                    return val[0]
-        return "Unnamed Series"
-
-    def get_title_compl(self, df):
-        if "TITLE_COMPL" in df.columns:
-            val = df["TITLE_COMPL"].dropna().unique()
-            if len(val) > 0:
-                return val[0]
-        return None
+                # The index de-duplicates labels and makes them searchable
+                label = self.catalogue_index.add(
+                    key, label=label, name=self.data_retrieval.get_name_from_key(key),
+                    title=title, title_compl=compl
+                )
+                self.series_name_map[label] = key
+                self.series_key_map[key] = label
+                self.title_compl_map[key] = compl
+
+    def search_options(self, query):
+        # At most SELECTOR_LIMIT labels; says so when the catalogue or the hits were cut
+        labels = self.catalogue_index.search_labels(query, limit=SELECTOR_LIMIT + 1)
+        if len(labels) > SELECTOR_LIMIT:
+            total = len(self.catalogue_index) if not (query or "").strip() else f"more than {SELECTOR_LIMIT}"
+            st.sidebar.caption(f"Showing {SELECTOR_LIMIT} of {total} datasets; type to narrow the list.")
+            labels = labels[:SELECTOR_LIMIT]
+        return labels
+
+    def get_title(self, key):
+        return self.data_retrieval.metadata.field(key, "title", "Unnamed Series")
+
+    def get_title_compl(self, key):
+        return self.data_retrieval.metadata.field(key, "title_compl")
 
     def run(self):
         # ❌ Removed: st.set_page_config(...) — should only exist in main entry script
 
         st.markdown("<div style='text-align: center; font-size: 18px;'>📊 <strong>Uncompromised Research Dashboard</strong></div>", unsafe_allow_html=True)
 
-        dataset_names = list(self.series_name_map.keys())
+        if not self.series_name_map:
+            st.warning("No datasets available.")
+            return
+
+        search_query = st.sidebar.text_input("Search datasets", key="dataset_search")
+        dataset_names = self.search_options(search_query)
+        if not dataset_names:
+            st.sidebar.warning("No datasets match the search.")
+            return
         selected_name = st.sidebar.selectbox("Select Dataset", dataset_names)
         selected_key = self.series_name_map[selected_name]
 
@@ -82,86 +129,209 @@ class Dashboard:
                 formatted = f"<b>{full_title}</b>"
             st.sidebar.markdown(formatted, unsafe_allow_html=True)
 
-        selected_comparisons = st.sidebar.multiselect("Compare with:", dataset_names)
+        compare_query = st.sidebar.text_input("Search comparisons", key="compare_search")
+        kept = [name for name in st.session_state.get("compare_selection", []) if name in self.series_name_map]
+        compare_options = kept + [
+            name for name in self.search_options(compare_query) if name not in kept
+        ]
+        selected_comparisons = st.sidebar.multiselect("Compare with:", compare_options, key="compare_selection")
+
+        with st.sidebar.expander("Memory usage"):
+            cache = self.data_retrieval.DICT_data
+            st.caption(
+                f"{cache.resident_bytes / 2**20:.1f} MiB of {cache.budget_bytes / 2**20:.0f} MiB budget "
+                f"({cache.shared_bytes / 2**20:.1f} MiB mapped from the shared store)"
+            )
+            st.dataframe(self.data_retrieval.memory_report(), hide_index=True)
+
+        series_keys = {selected_name: selected_key}
+        for name in selected_comparisons:
+            series_keys[name] = self.series_name_map[name]
+
+        main_title = selected_name.split(" (")[0].strip()
+        full_title = self.title_compl_map.get(selected_key, "")
+        if full_title and full_title.startswith(main_title):
+            extra_info = full_title.replace(main_title, "").strip(" -–:()")
+        else:
+            extra_info = full_title.strip()
+        chart_title = f"<b>{main_title}</b><br><span style='font-size:11px; font-weight:normal;'>{extra_info}</span>" if extra_info else f"<b>{main_title}</b>"
+
+        self.render_analysis(selected_key, series_keys, chart_title)
 
-        base_df = self.data_retrieval.DICT_data[selected_key]
-        base_df["TIME_PERIOD"] = pd.to_datetime(base_df["TIME_PERIOD"])
-        min_date = base_df["TIME_PERIOD"].min()
-        max_date = base_df["TIME_PERIOD"].max()
+    # Sidebar changes (dataset, comparisons) rerun the whole page. The controls
+    # below live in nested fragments so each one reruns only what depends on it:
+    #   render_analysis  view option, sub option, resampling -> transform
+    #   render_view      time range, section, chart type     -> slice, figure / tables
+    #   render_relationships  its own transform, lag and window
+    @st.fragment
+    def render_analysis(self, selected_key, series_keys, chart_title):
+        # Shallow copies: a session writing a column never reaches the shared frames
+        frames = {
+            name: self.data_retrieval.DICT_data[key].copy(deep=False) for name, key in series_keys.items()
+            if "OBS_VALUE" in self.data_retrieval.DICT_data[key].columns
+        }
+        if not frames:
+            st.warning("No valid data selected.")
+            return
 
-        time_range = st.sidebar.date_input(
+        col1, col2, col3, col4 = st.columns(4)
+        view_option = col1.radio("View Option", VIEW_OPTIONS, horizontal=True, key="view_option")
+        sub_option = None
+        if view_option != "Original Data":
+            sub_option = col2.selectbox("Sub Option", ["Difference", "Rate of Change"], key="sub_option")
+
+        # Mixed frequencies are aligned on the coarsest calendar
+        frequencies = {
+            normalize_frequency(self.visualization.series_frequency(name, df, series_keys))
+            for name, df in frames.items()
+        }
+        resample_rule = "last"
+        if len(frequencies) > 1:
+            resample_rule = col3.selectbox(
+                "Resampling Rule", list(RESAMPLE_RULES), key="resample_rule",
+                help="How higher-frequency series are aggregated onto the common calendar."
+            )
+
+        # Earlier vintages of the selected series, rebuilt from the stored deltas
+        as_of = None
+        vintages = vintage_store.vintages(selected_key)
+        if len(vintages) > 1:
+            # Options are vintage positions: fetch times can share a second
+            past = vintages["fetched_at"].iloc[-2::-1]
+            choice = col4.selectbox(
+                "As of", ["Latest", *past.index], key="as_of",
+                format_func=lambda i: i if i == "Latest" else f"{past[i]:%Y-%m-%d %H:%M:%S} (vintage {i + 1})",
+                help="Show the series as published at an earlier fetch."
+            )
+            if choice != "Latest":
+                as_of = past[choice]
+                frames = self.frames_as_of(frames, series_keys, as_of)
+
+        panel = self.memoized(
+            ("aligned", tuple(series_keys.items()), resample_rule, as_of),
+            series_keys.values(),
+            lambda: self.visualization.align_frames(frames, series_keys, resample_rule)
+        )
+        transformed, suffix = self.memoized(
+            ("transformed", tuple(series_keys.items()), resample_rule, as_of, view_option, sub_option),
+            series_keys.values(),
+            lambda: panel.transform(view_option, sub_option)
+        )
+
+        selected_dates = pd.to_datetime(frames[next(iter(frames))]["TIME_PERIOD"])
+        self.render_view(
+            selected_key, series_keys, frames, chart_title, view_option, sub_option,
+            panel, transformed, suffix, selected_dates.min(), selected_dates.max(), as_of
+        )
+
+    @st.fragment
+    def render_view(
+        self, selected_key, series_keys, frames, chart_title, view_option, sub_option,
+        panel, transformed, suffix, min_date, max_date, as_of=None
+    ):
+        col1, col2 = st.columns([2, 1])
+        time_range = col1.date_input(
             "Select Time Range",
             value=[min_date, max_date],
             min_value=min_date,
             max_value=max_date
         )
+        chart_type = col2.selectbox("Chart Type", CHART_TYPES, key="chart_type")
 
-        view_option = st.sidebar.radio("View Option", ["Original Data", "Period-on-Period", "Interannual"])
-        sub_option = None
-        if view_option != "Original Data":
-            sub_option = st.sidebar.selectbox("Sub Option", ["Difference", "Rate of Change"])
+        start, end = None, None
+        if time_range and isinstance(time_range, (list, tuple)) and len(time_range) == 2:
+            start, end = pd.Timestamp(time_range[0]), pd.Timestamp(time_range[1])
+        observed, sliced = panel.slice(start, end), transformed.slice(start, end)
 
-        freq = self.visualization.infer_frequency(base_df)
-        chart_types = ["Line", "Bar", "Scatter", "Area"]
-        chart_type = st.sidebar.selectbox("Chart Type", chart_types)
+        # Only the visible section is computed
+        section = st.radio("Section", SECTIONS, horizontal=True, key="ecb_section", label_visibility="collapsed")
 
-        def filter_df(df):
-            df = df.copy()
-            df["TIME_PERIOD"] = pd.to_datetime(df["TIME_PERIOD"])
-            if time_range and isinstance(time_range, list) and len(time_range) == 2:
-                df = df[(df["TIME_PERIOD"] >= pd.to_datetime(time_range[0])) & (df["TIME_PERIOD"] <= pd.to_datetime(time_range[1]))]
-            return df
+        if section == SECTIONS[0]:
+            chart, _, _ = self.visualization.panel_figure(
+                sliced, suffix, frames, chart_title, view_option, sub_option,
+                chart_height=500, chart_type=chart_type.lower(), series_keys=series_keys
+            )
+            st.plotly_chart(chart, use_container_width=True)
+        elif section == SECTIONS[2]:
+            for dataset_name, raw_df in frames.items():
+                st.markdown(f"**{dataset_name}**")
+                metadata = self.data_retrieval.metadata.get(series_keys[dataset_name])
+                st.markdown(self.visualization.describe_metadata_markdown(raw_df, metadata))
+                st.markdown("---")
+        elif section == SECTIONS[4]:
+            self.render_relationships(selected_key, series_keys)
+        else:
+            show_table = section == SECTIONS[1]
+            table_data = self.visualization.panel_tables(
+                observed, sliced, suffix, frames, view_option, series_keys, start, end, as_of,
+                tables=show_table, stats=not show_table
+            )
+            for label, df, _, _, stats_df in table_data:
+                st.markdown(f"**{label}**")
+                st.dataframe(df if section == SECTIONS[1] else stats_df, use_container_width=True)
+                st.markdown("---")
 
-        combined_data = []
-        selected_df = self.data_retrieval.DICT_data[selected_key]
-        combined_data.append((selected_name, filter_df(selected_df)))
+    def frames_as_of(self, frames, series_keys, as_of):
+        snapshots = {}
+        for name in frames:
+            snapshot = self.data_retrieval.series_as_of(series_keys[name], as_of)
+            if snapshot is None:
+                st.caption(f"No vintage of {name} was fetched by {as_of:%Y-%m-%d %H:%M}; it is left out.")
+            else:
+                snapshots[name] = snapshot
+        return snapshots
 
-        for name in selected_comparisons:
-            key = self.series_name_map[name]
-            df = self.data_retrieval.DICT_data[key]
-            combined_data.append((name, filter_df(df)))
+    def memoized(self, cache_key, keys, compute):
+        # Per-process LRU shared by all sessions; data versions keep entries fresh
+        version = tuple(self.data_retrieval.series_versions.get(key, 0) for key in keys)
+        cache_key = cache_key + (version,)
+        with self._memo_lock:
+            if cache_key in self._memo:
+                self._memo.move_to_end(cache_key)
+                return self._memo[cache_key]
+        result = compute()
+        with self._memo_lock:
+            self._memo[cache_key] = result
+            while len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return result
 
-        main_title = selected_name.split(" (")[0].strip()
-        full_title = self.title_compl_map.get(selected_key, "")
-        if full_title and full_title.startswith(main_title):
-            extra_info = full_title.replace(main_title, "").strip(" -–:()")
-        else:
-            extra_info = full_title.strip()
-        chart_title = f"<b>{main_title}</b><br><span style='font-size:11px; font-weight:normal;'>{extra_info}</span>" if extra_info else f"<b>{main_title}</b>"
+    @st.fragment
+    def render_relationships(self, selected_key, series_keys):
+        col1, col2, col3 = st.columns(3)
+        transform_label = col1.selectbox("Transform", list(RELATIONSHIP_TRANSFORMS), key="rel_transform")
+        max_lag = col2.slider("Max Lead/Lag (periods)", 0, 24, 12, key="rel_max_lag")
+        window = col3.slider("Rolling Window (periods)", 12, 120, 36, key="rel_window")
+
+        # Selected series are aligned on the coarsest of their frequencies
+        transform = RELATIONSHIP_TRANSFORMS[transform_label]
+        keys = list(dict.fromkeys(series_keys.values()))
 
-        if combined_data:
-            chart, table_data, color_map, axis_map = self.visualization.compare_datasets_chart(
-                combined_data=combined_data,
-                view_option=view_option,
-                chart_title=chart_title,
-                sub_option=sub_option,
-                y_axis_label=None,
-                x_axis_label="Date",
-                chart_height=500,
-                chart_type=chart_type.lower()
+        if len(keys) > 1:
+            corr = self.analytics.correlation_matrix(keys, transform)
+            corr = corr.rename(index=self.series_key_map, columns=self.series_key_map)
+            st.plotly_chart(
+                self.visualization.correlation_heatmap(corr, "<b>Correlation Matrix</b>"),
+                use_container_width=True
+            )
+            rolling = self.analytics.rolling_correlation(selected_key, keys[1:], window, transform)
+            rolling = rolling.rename(columns=self.series_key_map)
+            st.plotly_chart(
+                self.visualization.rolling_chart(rolling, f"<b>{window}-Period Rolling Correlation</b>", "Correlation"),
+                use_container_width=True
             )
-            self.table_data = table_data
-
-            tab1, tab2, tab3, tab4 = st.tabs(["📈 Chart", "📋 Table", "ⓘ Description", "📊 Summary Stats"])
-            with tab1:
-                st.plotly_chart(chart, use_container_width=True)
-            with tab2:
-                for label, df, _, _, _ in self.table_data:
-                    st.markdown(f"**{label}**")
-                    st.dataframe(df, use_container_width=True)
-                    st.markdown("---")
-            with tab3:
-                for _, _, dataset_name, raw_df, _ in self.table_data:
-                    st.markdown(f"**{dataset_name}**")
-                    st.markdown(self.visualization.describe_metadata_markdown(raw_df))
-                    st.markdown("---")
-            with tab4:
-                for label, _, _, _, stats_df in self.table_data:
-                    st.markdown(f"**{label}**")
-                    st.dataframe(stats_df, use_container_width=True)
-                    st.markdown("---")
         else:
-            st.warning("No valid data selected.")
+            st.info("Add comparison datasets to see their correlation matrix.")
+
+        # Whole catalogue against the selected series, best lead/lag per series
+        st.markdown("**Strongest relationships across the catalogue**")
+        screen = self.analytics.screen(selected_key, None, max_lag, transform)
+        screen["Series"] = screen["Series"].map(self.series_key_map)
+        st.dataframe(screen, use_container_width=True)
+        st.caption(
+            "Each series is paired with the selected dataset on the coarser of their two frequencies. "
+            "A positive best lag means the series leads the selected dataset by that many periods."
+        )
 
 
 # Only needed for standalone testing — not required when using as a module
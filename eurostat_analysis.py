@@ -1,13 +1,44 @@
+import threading
+import warnings
+from collections import OrderedDict
 import eurostat
 import pandas as pd
 import numpy as np
 import scipy.stats as stats
+import plotly.express as px
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import streamlit as st
+from single_flight import SingleFlight
+from eurostat_stream import stream_dataset
+from eurostat_periods import period_columns
+
+# Shared across sessions so identical dataset slices are downloaded once
+eurostat_flight = SingleFlight("eurostat")
 
 # ------------------ 1. Fetch Data ------------------
 def fetch_data(dataset_code, filter_pars):
-    return eurostat.get_data_df(dataset_code, filter_pars=filter_pars)
+    flight_key = (dataset_code, filter_key(filter_pars))
+    return eurostat_flight.do(flight_key, lambda: eurostat.get_data_df(dataset_code, filter_pars=filter_pars))
+
+def filter_key(filter_pars):
+    # Hashable, order-independent form of the Eurostat filter dict
+    return tuple(sorted(
+        (name, tuple(value) if isinstance(value, (list, tuple)) else value)
+        for name, value in filter_pars.items()
+    ))
+
+def fetch_prepared(dataset_code, filter_pars):
+    # prepare_data() frames parsed straight from the streamed TSV into float64
+    # blocks; the wide get_data_df() frame is only built if streaming fails
+    def load():
+        try:
+            return stream_dataset(dataset_code, filter_pars).frames()
+        except Exception as e:
+            print(f"❌ Streaming fetch failed for {dataset_code}, falling back to the eurostat client: {e}")
+            return prepare_data(fetch_data(dataset_code, filter_pars))
+
+    return eurostat_flight.do(("prepared", dataset_code, filter_key(filter_pars)), load)
 
 # ------------------ 2. Prepare Data ------------------
 def prepare_data(df_data):
@@ -28,123 +59,155 @@ def compute_month_over_month(dataframes):
 def compute_percentiles(mom_dataframes):
     percentile_dict = {}
     for key, df in mom_dataframes.items():
-        df_percentiles = df.copy()
-        months = df.columns.str[-2:].unique()
-        for geo in df.index:
-            for month in months:
-                month_cols = [col for col in df.columns if col.endswith(month)]
-                month_values = df.loc[geo, month_cols].dropna().values
+        values = df.to_numpy(dtype=float)
+        percentiles = values.copy()
+        for _, month_cols in period_columns(df.columns).groups():
+            for row, row_values in enumerate(values[:, month_cols]):
+                month_values = row_values[~np.isnan(row_values)]
                 if month_values.size == 0:
                     continue
-                percentiles = [
-                    stats.percentileofscore(month_values, val, kind='rank') if not np.isnan(val) else np.nan
-                    for val in df.loc[geo, month_cols]
-                ]
-                df_percentiles.loc[geo, month_cols] = percentiles
-        percentile_dict[key] = df_percentiles
+                percentiles[row, month_cols] = stats.percentileofscore(month_values, row_values, kind='rank')
+        percentile_dict[key] = pd.DataFrame(percentiles, index=df.index, columns=df.columns)
     return percentile_dict
 
 # ------------------ 5. Calculate Monthly Medians ------------------
 def calculate_monthly_medians(mom_dataframes):
     records = []
     for key, df in mom_dataframes.items():
-        months = sorted(df.columns.str[-2:].unique())
-        for geo in df.index:
-            medians = {'coicop': key, 'geo': geo}
-            for month in months:
-                month_cols = [col for col in df.columns if col.endswith(month)]
-                month_values = df.loc[geo, month_cols].values
-                month_values = month_values[~np.isnan(month_values)]
-                medians[month] = np.median(month_values) if month_values.size > 0 else np.nan
-            records.append(medians)
+        values = df.to_numpy(dtype=float)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # a month with no values has a NaN median
+            medians = {
+                f"{month:02d}": np.nanmedian(values[:, month_cols], axis=1)
+                for month, month_cols in period_columns(df.columns).groups()
+            }
+        for row, geo in enumerate(df.index):
+            records.append({'coicop': key, 'geo': geo, **{month: median[row] for month, median in medians.items()}})
     median_df = pd.DataFrame(records)
     median_df = median_df.set_index(['coicop', 'geo']).sort_index(axis=1)
     return median_df
 
 # ------------------ 6. Plot Dynamic Charts ------------------
+def chart_frame(df, start_year, selected_geos=None, moving_avg_period=0):
+    # Months from start_year as rows, countries as columns, smoothed if asked
+    df_filtered = df.iloc[:, period_columns(df.columns).since(start_year)]
+    if df_filtered.columns.empty:
+        return None
+
+    if selected_geos:
+        df_filtered = df_filtered.loc[selected_geos]
+
+    df_transposed = df_filtered.T
+    df_transposed.index.name = "Date"
+    if moving_avg_period:
+        return df_transposed.rolling(window=moving_avg_period, min_periods=1).mean()
+    return df_transposed
+
+def chart_layout(title, subtitle, height=500):
+    return dict(
+        title={
+            "text": f"<b>{title}</b><br><span style='font-size:13px; font-weight:normal'>{subtitle}</span>",
+            "x": 0.5,
+            "xanchor": "center"
+        },
+        height=height,
+        template="simple_white",
+        plot_bgcolor="#f8fafd",
+        paper_bgcolor="#f8fafd",
+        font=dict(family="Arial", size=13),
+        legend=dict(title="", font=dict(size=12))
+    )
+
+def build_figure(key, df, start_year, selected_geos=None, moving_avg_period=0):
+    df_chart = chart_frame(df, start_year, selected_geos, moving_avg_period)
+    if df_chart is None:
+        return None
+
+    fig = go.Figure()
+    for geo in df_chart.columns:
+        fig.add_trace(go.Scatter(
+            x=df_chart.index,
+            y=df_chart[geo],
+            mode="lines",
+            name=geo,
+            line=dict(width=2)
+        ))
+
+    # --- Percentile Chart ---
+    if moving_avg_period == 0:
+        title = f"Percentiles for {key} (From {start_year})"
+        subtitle, y_title = "Monthly inflation percentiles by country", "Percentile"
+    # --- Moving Average Chart ---
+    else:
+        title = f"{moving_avg_period}-Month Moving Average for {key} (From {start_year})"
+        subtitle, y_title = "Smoothed trends by country", "Moving Avg. Percentile"
+
+    fig.update_layout(
+        **chart_layout(title, subtitle),
+        xaxis=dict(title=dict(text="Date", font=dict(size=13)), tickfont=dict(size=12)),
+        yaxis=dict(title=dict(text=y_title, font=dict(size=13)), tickfont=dict(size=12)),
+    )
+    return fig
+
+def build_small_multiples(df_dict, start_year, selected_geos=None, moving_avg_period=0, n_cols=3):
+    # Every category in one figure: one panel per COICOP, one colour per country
+    frames = [(key, chart_frame(df, start_year, selected_geos, moving_avg_period)) for key, df in df_dict.items()]
+    frames = [(key, df) for key, df in frames if df is not None]
+    if not frames:
+        return None
+
+    n_rows = -(-len(frames) // n_cols)
+    fig = make_subplots(
+        rows=n_rows, cols=n_cols, shared_xaxes=True, shared_yaxes=True,
+        subplot_titles=[key.replace("d_", "") for key, _ in frames],
+        vertical_spacing=min(0.08, 0.5 / n_rows), horizontal_spacing=0.03
+    )
+    colors = {}
+    palette = px.colors.qualitative.Plotly
+    for i, (key, df_chart) in enumerate(frames):
+        for geo in df_chart.columns:
+            color = colors.setdefault(geo, palette[len(colors) % len(palette)])
+            fig.add_trace(go.Scatter(
+                x=df_chart.index,
+                y=df_chart[geo],
+                mode="lines",
+                name=geo,
+                legendgroup=geo,
+                showlegend=i == 0,
+                line=dict(width=1.5, color=color)
+            ), row=i // n_cols + 1, col=i % n_cols + 1)
+
+    if moving_avg_period == 0:
+        title, subtitle = f"Percentiles by Category (From {start_year})", "Monthly inflation percentiles by country"
+    else:
+        title, subtitle = f"{moving_avg_period}-Month Moving Averages by Category (From {start_year})", "Smoothed trends by country"
+    fig.update_layout(**chart_layout(title, subtitle, height=max(500, 260 * n_rows)))
+    return fig
+
 def plot_data(df_dict, start_year, selected_geos=None, moving_avg_period=12):
     for key, df in df_dict.items():
-        filtered_cols = [col for col in df.columns if int(col[:4]) >= start_year]
-        if not filtered_cols:
-            continue
-
-        df_filtered = df[filtered_cols]
-        if selected_geos:
-            df_filtered = df_filtered.loc[selected_geos]
-
-        df_transposed = df_filtered.T
-        df_transposed.index.name = "Date"
-
-        # --- Percentile Chart ---
-        if moving_avg_period == 0:
-            fig = go.Figure()
-
-            for geo in df_transposed.columns:
-                fig.add_trace(go.Scatter(
-                    x=df_transposed.index,
-                    y=df_transposed[geo],
-                    mode="lines",
-                    name=geo,
-                    line=dict(width=2)
-                ))
-
-            fig.update_layout(
-                title={
-                    "text": f"<b>Percentiles for {key} (From {start_year})</b><br><span style='font-size:13px; font-weight:normal'>Monthly inflation percentiles by country</span>",
-                    "x": 0.5,
-                    "xanchor": "center"
-                },
-                xaxis=dict(
-                    title=dict(text="Date", font=dict(size=13)),
-                    tickfont=dict(size=12)
-                ),
-                yaxis=dict(
-                    title=dict(text="Percentile", font=dict(size=13)),
-                    tickfont=dict(size=12)
-                ),
-                height=500,
-                template="simple_white",
-                plot_bgcolor="#f8fafd",
-                paper_bgcolor="#f8fafd",
-                font=dict(family="Arial", size=13),
-                legend=dict(title="", font=dict(size=12))
-            )
+        fig = build_figure(key, df, start_year, selected_geos, moving_avg_period)
+        if fig is not None:
             st.plotly_chart(fig, use_container_width=True)
 
-        # --- Moving Average Chart ---
-        else:
-            df_moving_avg = df_transposed.rolling(window=moving_avg_period, min_periods=1).mean()
-
-            fig_avg = go.Figure()
-
-            for geo in df_moving_avg.columns:
-                fig_avg.add_trace(go.Scatter(
-                    x=df_moving_avg.index,
-                    y=df_moving_avg[geo],
-                    mode="lines",
-                    name=geo,
-                    line=dict(width=2)
-                ))
-
-            fig_avg.update_layout(
-                title={
-                    "text": f"<b>{moving_avg_period}-Month Moving Average for {key} (From {start_year})</b><br><span style='font-size:13px; font-weight:normal'>Smoothed trends by country</span>",
-                    "x": 0.5,
-                    "xanchor": "center"
-                },
-                xaxis=dict(
-                    title=dict(text="Date", font=dict(size=13)),
-                    tickfont=dict(size=12)
-                ),
-                yaxis=dict(
-                    title=dict(text="Moving Avg. Percentile", font=dict(size=13)),
-                    tickfont=dict(size=12)
-                ),
-                height=500,
-                template="simple_white",
-                plot_bgcolor="#f8fafd",
-                paper_bgcolor="#f8fafd",
-                font=dict(family="Arial", size=13),
-                legend=dict(title="", font=dict(size=12))
-            )
-            st.plotly_chart(fig_avg, use_container_width=True)
+# ------------------ 7. Figure Cache ------------------
+FIGURE_CACHE_SIZE = 256
+_figure_cache = OrderedDict()
+_figure_lock = threading.Lock()
+_MISSING = object()  # cached "no figure" (None) is a hit too
+
+def cached_figure(cache_key, build):
+    # One built Figure per key, shared by every session and handed straight to
+    # st.plotly_chart, which only reads it; callers must not update it.
+    # cache_key must identify the data version as well as the chart options.
+    with _figure_lock:
+        fig = _figure_cache.get(cache_key, _MISSING)
+        if fig is not _MISSING:
+            _figure_cache.move_to_end(cache_key)
+    if fig is _MISSING:
+        fig = eurostat_flight.do(("figure", cache_key), build)
+        with _figure_lock:
+            _figure_cache[cache_key] = fig
+            while len(_figure_cache) > FIGURE_CACHE_SIZE:
+                _figure_cache.popitem(last=False)
+    return fig
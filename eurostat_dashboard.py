@@ -4,7 +4,13 @@ import streamlit as st
 st.set_page_config(page_title="Uncompromised Research Dashboard", layout="wide")
 
 from eurostat_page import run_eurostat_dashboard
-from ecb_dashboard import Dashboard
+from ecb_dashboard import Dashboard, STORE_MAX_AGE
+
+
+@st.cache_resource(ttl=STORE_MAX_AGE, show_spinner="Loading ECB catalogue...")
+def load_dashboard(pickle_file_path):
+    # Built once per process: the catalogue index and series map are shared by all sessions
+    return Dashboard(pickle_file_path)
 
 # ------------------ Sidebar Title ------------------
 st.sidebar.markdown(
@@ -29,7 +35,7 @@ choice = st.sidebar.radio("Select a page", menu)
 
 # ------------------ Routing ------------------
 if choice == "ECB Dashboard":
-    dashboard = Dashboard("ecb_dashboard_data.pkl")
+    dashboard = load_dashboard("ecb_dashboard_data.pkl")
     dashboard.run()
 
 elif choice == "Eurostat Dashboard":
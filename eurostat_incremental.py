@@ -0,0 +1,169 @@
+import threading
+from bisect import insort
+
+import numpy as np
+import pandas as pd
+
+from eurostat_analysis import compute_month_over_month, compute_percentiles, calculate_monthly_medians
+from eurostat_periods import period_columns
+
+
+def rank_percentiles(sorted_values, values):
+    # scipy.stats.percentileofscore(sorted_values, v, kind='rank') for every v, via bisection
+    ordered = np.asarray(sorted_values, dtype=float)
+    left = np.searchsorted(ordered, values, side="left")
+    right = np.searchsorted(ordered, values, side="right")
+    percentiles = (left + right + (left < right)) * (50.0 / len(ordered))
+    percentiles[np.isnan(values)] = np.nan
+    return percentiles
+
+
+def sorted_median(sorted_values):
+    n = len(sorted_values)
+    if n == 0:
+        return np.nan
+    middle = n // 2
+    return sorted_values[middle] if n % 2 else (sorted_values[middle - 1] + sorted_values[middle]) / 2
+
+
+class _CoicopState:
+    # MoM values, percentile ranks and one sorted list per (geo, calendar month)
+    # for one COICOP frame of index levels (geo x 'YYYY-MM').
+
+    def __init__(self, levels):
+        self.index = levels.index
+        self.columns = levels.columns
+        self.levels = levels.to_numpy(dtype=float)
+        self.mom = compute_month_over_month({"": levels})[""].to_numpy(dtype=float)
+        self.month_cols = {
+            f"{month:02d}": list(positions) for month, positions in period_columns(self.columns).groups()
+        }
+
+        self.groups = {}
+        self.percentiles = np.full_like(self.mom, np.nan)
+        for month, cols in self.month_cols.items():
+            for row in range(len(self.index)):
+                values = self.mom[row, cols]
+                self.groups[(row, month)] = sorted(values[~np.isnan(values)].tolist())
+                self.rank(row, month)
+
+    def rank(self, row, month):
+        group = self.groups[(row, month)]
+        if group:
+            cols = self.month_cols[month]
+            self.percentiles[row, cols] = rank_percentiles(group, self.mom[row, cols])
+
+    def new_columns(self, levels):
+        # Columns appended after the ones we hold, or None if history was revised
+        n_old = len(self.columns)
+        if (
+            n_old == 0
+            or not levels.index.equals(self.index)
+            or len(levels.columns) < n_old
+            or not levels.columns[:n_old].equals(self.columns)
+            or not np.array_equal(levels.iloc[:, :n_old].to_numpy(dtype=float), self.levels, equal_nan=True)
+        ):
+            return None
+        return list(levels.columns[n_old:])
+
+    def append(self, levels, new_columns):
+        new_levels = levels[new_columns].to_numpy(dtype=float)
+        chained = np.column_stack([self.levels[:, -1:], new_levels])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            new_mom = (chained[:, 1:] / chained[:, :-1] - 1) * 100  # as pct_change(axis=1) * 100
+
+        start = len(self.columns)
+        self.columns = levels.columns[:start + len(new_columns)]
+        self.levels = np.column_stack([self.levels, new_levels])
+        self.mom = np.column_stack([self.mom, new_mom])
+        self.percentiles = np.column_stack([self.percentiles, np.full_like(new_mom, np.nan)])
+
+        # Each new observation lands in one group; only that group's ranks move
+        for offset, number in enumerate(period_columns(new_columns).months):
+            month = f"{number:02d}"
+            self.month_cols.setdefault(month, []).append(start + offset)
+            for row in range(len(self.index)):
+                group = self.groups.setdefault((row, month), [])
+                value = new_mom[row, offset]
+                if not np.isnan(value):
+                    insort(group, value)
+                self.rank(row, month)
+
+    def percentile_frame(self):
+        return pd.DataFrame(self.percentiles, index=self.index, columns=self.columns)
+
+    def median_records(self, key):
+        months = sorted(self.month_cols)
+        return [
+            {"coicop": key, "geo": geo, **{month: sorted_median(self.groups[(row, month)]) for month in months}}
+            for row, geo in enumerate(self.index)
+        ]
+
+
+class IncrementalPercentiles:
+    # Percentile ranks and calendar-month medians maintained as months arrive.
+    #
+    # update() with the latest prepared frames appends new trailing months:
+    # each new MoM value is bisected into its (geo, month) list, that group's
+    # ranks are refreshed and its median is read off the list. Frames whose
+    # history was revised, or whose countries changed, are rebuilt.
+
+    def __init__(self, prepared=None):
+        self._states = {}
+        self._lock = threading.Lock()
+        if prepared:
+            self.update(prepared)
+
+    def update(self, prepared):
+        # Returns {key: "rebuilt" | "appended"} for the frames that changed
+        changes = {}
+        with self._lock:
+            for key in list(self._states):
+                if key not in prepared:
+                    del self._states[key]
+            for key, levels in prepared.items():
+                state = self._states.get(key)
+                new_columns = None if state is None else state.new_columns(levels)
+                if new_columns is None:
+                    self._states[key] = _CoicopState(levels)
+                    changes[key] = "rebuilt"
+                elif new_columns:
+                    state.append(levels, new_columns)
+                    changes[key] = "appended"
+        return changes
+
+    def percentiles(self):
+        with self._lock:
+            return {key: state.percentile_frame() for key, state in self._states.items()}
+
+    def medians(self):
+        with self._lock:
+            records = [record for key, state in self._states.items() for record in state.median_records(key)]
+        return pd.DataFrame(records).set_index(["coicop", "geo"]).sort_index(axis=1)
+
+    def verify(self, atol=1e-9):
+        # Verification mode: compare against a full recompute from the stored levels
+        with self._lock:
+            levels = {
+                key: pd.DataFrame(state.levels, index=state.index, columns=state.columns)
+                for key, state in self._states.items()
+            }
+        mom = compute_month_over_month(levels)
+        expected_percentiles = compute_percentiles(mom)
+        expected_medians = calculate_monthly_medians(mom)
+
+        mismatches = [
+            key for key, frame in self.percentiles().items()
+            if not np.allclose(frame.to_numpy(dtype=float), expected_percentiles[key].to_numpy(dtype=float),
+                               rtol=0, atol=atol, equal_nan=True)
+        ]
+        medians = self.medians().reindex(index=expected_medians.index, columns=expected_medians.columns)
+        if not np.allclose(medians.to_numpy(dtype=float), expected_medians.to_numpy(dtype=float),
+                           rtol=0, atol=atol, equal_nan=True):
+            mismatches.append("medians")
+
+        if mismatches:
+            print(f"❌ Incremental percentiles differ from a full recompute for: {', '.join(mismatches)}")
+        else:
+            print("✅ Incremental percentiles match a full recompute.")
+        return not mismatches
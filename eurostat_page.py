@@ -1,10 +1,87 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
 import streamlit as st
 import pandas as pd
-from pathlib import Path
 from eurostat_analysis import (
-    fetch_data, prepare_data, compute_month_over_month,
-    compute_percentiles, calculate_monthly_medians, plot_data
+    fetch_prepared,
+    build_figure, build_small_multiples, cached_figure,
+    filter_key, eurostat_flight
 )
+from eurostat_incremental import IncrementalPercentiles
+from series_store import shared_store
+
+STORE_MAX_AGE = 6 * 3600  # seconds before a published slice is recomputed
+MEDIANS_FRAME = "__medians__"
+VIEWS = ["📊 Percentile Charts", "📈 Moving Averages", "🧾 Medians Table"]
+VERIFY_INCREMENTAL = os.environ.get("EUROSTAT_VERIFY_INCREMENTAL") == "1"  # also run the full recompute
+
+DATASET_CODE = "prc_hicp_midx"
+UNIT = "I15"
+AVAILABLE_GEOS = ['EA', 'DE', 'FR', 'IT', 'ES', 'NL']
+COICOP_OPTIONS = [
+    'CP00', 'CP01', 'CP02', 'CP03', 'CP04', 'CP05', 'CP06',
+    'CP07', 'CP08', 'CP09', 'CP10', 'CP11', 'CP12',
+    'NRG', 'TOT_X_NRG', 'TOT_X_NRG_FOOD'
+]
+
+INCREMENTAL_STATES = 16  # published slices whose incremental state is kept per process
+
+# namespace -> IncrementalPercentiles, so a refresh only folds in the new months;
+# least recently refreshed slices are dropped and rebuilt in full if they return
+incremental_states = OrderedDict()
+_states_lock = threading.Lock()
+
+# ------------------ Data Loading ------------------
+def load_processed_data(dataset_code, filters):
+    # Percentile / median frames live in the shared store so every session
+    # and worker process maps one copy instead of holding its own. Each
+    # country's percentiles and medians only depend on its own history, so one
+    # namespace holds every category and country and sessions take their rows.
+    full_filters = {**filters, "coicop": COICOP_OPTIONS, "geo": AVAILABLE_GEOS}
+    namespace = "eurostat-" + hashlib.sha1(repr((dataset_code, filter_key(full_filters))).encode()).hexdigest()[:12]
+    frames, version = shared_store.load_versioned(namespace, max_age=STORE_MAX_AGE)
+    if frames is None:
+        frames, version = eurostat_flight.do(
+            ("processed", namespace), lambda: build_processed_data(dataset_code, full_filters, namespace)
+        )
+
+    # The version the frames were read from, not whatever CURRENT says by now
+    coicops = {f"d_{code}" for code in filters["coicop"]}
+    percentiles = {
+        key: df[df.index.isin(filters["geo"])]
+        for key, df in frames.items() if key != MEDIANS_FRAME and key in coicops
+    }
+    medians = frames[MEDIANS_FRAME]
+    medians = medians[
+        medians.index.get_level_values("coicop").isin(coicops) & medians.index.get_level_values("geo").isin(filters["geo"])
+    ]
+    return percentiles, medians, f"{namespace}@{version}"
+
+def incremental_state(namespace):
+    with _states_lock:
+        state = incremental_states.get(namespace)
+        if state is None:
+            state = incremental_states[namespace] = IncrementalPercentiles()
+        incremental_states.move_to_end(namespace)
+        while len(incremental_states) > INCREMENTAL_STATES:
+            incremental_states.popitem(last=False)
+    return state
+
+def build_processed_data(dataset_code, filters, namespace):
+    prepared = fetch_prepared(dataset_code, filters)
+    state = incremental_state(namespace)
+    changes = state.update(prepared)
+    rebuilt = sum(change == "rebuilt" for change in changes.values())
+    print(f"✅ Percentiles for {namespace}: {len(changes) - rebuilt} categories extended, {rebuilt} rebuilt.")
+    if VERIFY_INCREMENTAL:
+        state.verify()
+    percentiles = state.percentiles()
+    medians = state.medians()
+    version = shared_store.publish(namespace, {**percentiles, MEDIANS_FRAME: medians})
+    return shared_store.load_versioned(namespace, version)
 
 def run_eurostat_dashboard():
     # ------------------ Compact Title ------------------
@@ -14,13 +91,9 @@ def run_eurostat_dashboard():
     )
 
     # ------------------ Configuration ------------------
-    dataset_code = "prc_hicp_midx"
-    available_geos = ['EA', 'DE', 'FR', 'IT', 'ES', 'NL']
-    coicop_options = [
-        'CP00', 'CP01', 'CP02', 'CP03', 'CP04', 'CP05', 'CP06',
-        'CP07', 'CP08', 'CP09', 'CP10', 'CP11', 'CP12',
-        'NRG', 'TOT_X_NRG', 'TOT_X_NRG_FOOD'
-    ]
+    dataset_code = DATASET_CODE
+    available_geos = AVAILABLE_GEOS
+    coicop_options = COICOP_OPTIONS
 
     # ------------------ Sidebar ------------------
     start_year = st.sidebar.slider("Start Year for Plotting", 2000, 2024, 2021)
@@ -38,68 +111,69 @@ def run_eurostat_dashboard():
         )
 
     filters = {
-        'unit': 'I15',
+        'unit': UNIT,
         'coicop': selected_coicop,
         'geo': selected_geos
     }
 
     # ------------------ Data Loading ------------------
-    @st.cache_data(show_spinner=True)
-    def load_processed_data(dataset_code, filters):
-        raw = fetch_data(dataset_code, filters)
-        prepared = prepare_data(raw)
-        mom = compute_month_over_month(prepared)
-        percentiles = compute_percentiles(mom)
-        medians = calculate_monthly_medians(mom)
-        return percentiles, medians
-
-    percentiles, medians = load_processed_data(dataset_code, filters)
-
-    # ------------------ Tabs ------------------
-    tab1, tab2, tab3 = st.tabs([
-        "📊 Percentile Charts",
-        "📈 Moving Averages",
-        "🧾 Medians Table"
-    ])
-
-    with tab1:
-        st.markdown(
-            "<h6 style='text-align: center; font-size: 15px;'>Monthly Inflation Percentile Charts</h6>",
-            unsafe_allow_html=True
+    with st.spinner("Loading Eurostat data..."):
+        percentiles, medians, data_version = load_processed_data(dataset_code, filters)
+
+    # ------------------ Views ------------------
+    # Only the selected view is built; st.tabs would render all three every rerun
+    view = st.radio("View", VIEWS, horizontal=True, label_visibility="collapsed")
+    keys = [key for key in percentiles if key.replace("d_", "") in selected_coicop]
+    geos_key = tuple(selected_geos)
+
+    if view == VIEWS[2]:
+        render_medians(medians, selected_coicop)
+        return
+
+    window = 0 if view == VIEWS[0] else moving_avg_period
+    if window == 0:
+        heading = "Monthly Inflation Percentile Charts"
+    else:
+        heading = f"{moving_avg_period}-Month Moving Averages"
+    st.markdown(
+        f"<h6 style='text-align: center; font-size: 15px;'>{heading}</h6>",
+        unsafe_allow_html=True
+    )
+
+    small_multiples = st.toggle("Show all categories in one figure", value=False)
+    if small_multiples:
+        fig = cached_figure(
+            ("multiples", tuple(keys), geos_key, start_year, window, data_version),
+            lambda: build_small_multiples({key: percentiles[key] for key in keys}, start_year, selected_geos, window)
         )
-        for key in percentiles:
-            coicop_code = key.replace("d_", "")
-            if coicop_code not in selected_coicop:
-                continue
-            df = percentiles[key]
-            plot_data({key: df}, start_year, selected_geos, moving_avg_period=0)
-
-    with tab2:
-        st.markdown(
-            f"<h6 style='text-align: center; font-size: 15px;'>{moving_avg_period}-Month Moving Averages</h6>",
-            unsafe_allow_html=True
+        if fig is not None:
+            st.plotly_chart(fig, use_container_width=True)
+        return
+
+    for i, key in enumerate(keys):
+        # Collapsed categories cost a toggle, not a figure
+        if not st.toggle(key.replace("d_", ""), value=i == 0, key=f"show_{key}"):
+            continue
+        fig = cached_figure(
+            (key, geos_key, start_year, window, data_version),
+            lambda key=key: build_figure(key, percentiles[key], start_year, selected_geos, window)
         )
-        for key in percentiles:
-            coicop_code = key.replace("d_", "")
-            if coicop_code not in selected_coicop:
-                continue
-            df = percentiles[key]
-            plot_data({key: df}, start_year, selected_geos, moving_avg_period)
-
-    with tab3:
-        st.subheader("Median Month-over-Month Inflation by Country and Category")
-
-        filtered_medians = medians.loc[
-            medians.index.get_level_values("coicop").isin([f'd_{c}' for c in selected_coicop])
-        ]
-        st.dataframe(filtered_medians)
-
-        excel_path = Path.home() / "Documents" / "ECB_inflation_percentiles" / "monthly_medians.xlsx"
-        filtered_medians.to_excel(excel_path)
-        with open(excel_path, "rb") as f:
-            st.download_button(
-                label="📥 Download as Excel",
-                data=f.read(),
-                file_name="monthly_medians.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+        if fig is not None:
+            st.plotly_chart(fig, use_container_width=True)
+
+def render_medians(medians, selected_coicop):
+    st.subheader("Median Month-over-Month Inflation by Country and Category")
+
+    filtered_medians = medians.loc[
+        medians.index.get_level_values("coicop").isin([f'd_{c}' for c in selected_coicop])
+    ]
+    st.dataframe(filtered_medians)
+
+    buffer = io.BytesIO()
+    filtered_medians.to_excel(buffer)
+    st.download_button(
+        label="📥 Download as Excel",
+        data=buffer.getvalue(),
+        file_name="monthly_medians.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+CACHE_SIZE = 32  # compiled column sets kept per process
+
+
+class PeriodColumns:
+    # The 'YYYY-MM' columns of a Eurostat frame, compiled once.
+    #
+    # years / months are integer arrays aligned with the columns. order lists
+    # the column positions grouped by calendar month (chronological within a
+    # month) and offsets[i]:offsets[i + 1] is the slice of order for
+    # month_values[i], so month grouping and start-year filtering are integer
+    # slicing instead of string matching.
+
+    def __init__(self, columns):
+        self.columns = pd.Index(columns)
+        dates = pd.to_datetime(self.columns.astype(str), format="%Y-%m")
+        self.years = np.asarray(dates.year, dtype=np.int32)
+        self.months = np.asarray(dates.month, dtype=np.int32)
+        self.ordinals = self.years * 12 + self.months - 1
+        self.chronological = bool(np.all(np.diff(self.ordinals) > 0))
+
+        self.order = np.argsort(self.months, kind="stable")
+        self.month_values, starts = np.unique(self.months[self.order], return_index=True)
+        self.offsets = np.append(starts, len(self.order))
+
+    def __len__(self):
+        return len(self.columns)
+
+    def groups(self):
+        # (month number, column positions) for each calendar month present
+        for i, month in enumerate(self.month_values):
+            yield int(month), self.order[self.offsets[i]:self.offsets[i + 1]]
+
+    def since(self, start_year):
+        # Positions of the columns from start_year on, a slice when the columns are in order
+        if self.chronological:
+            return slice(int(np.searchsorted(self.years, start_year, side="left")), len(self.columns))
+        return np.flatnonzero(self.years >= start_year)
+
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def period_columns(columns):
+    # Shared PeriodColumns for a set of columns; every COICOP frame of a dataset reuses one
+    key = tuple(columns)
+    with _lock:
+        compiled = _cache.get(key)
+        if compiled is not None:
+            _cache.move_to_end(key)
+            return compiled
+    compiled = PeriodColumns(columns)
+    with _lock:
+        _cache[key] = compiled
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return compiled
@@ -0,0 +1,231 @@
+import codecs
+import io
+import itertools
+import os
+import re
+import zlib
+from functools import lru_cache
+
+import eurostat
+import numpy as np
+import pandas as pd
+
+from sdmx_batch import create_session
+
+EUROSTAT_ENTRYPOINT = os.environ.get("EUROSTAT_SDMX_URL", "https://ec.europa.eu/eurostat/api/dissemination/sdmx/2.1")
+CHUNK_ROWS = 512  # rows parsed into one float64 block before it is set aside
+MAX_KEY_LENGTH = 1500  # characters of OR-ed SDMX key per request
+INDEX_NAME = "geo\\TIME_PERIOD"  # index label of the prepare_data() frames
+FLAGS = re.compile(r" [bcdefnprsuz]+")  # observation flags, e.g. the " p" of "101.23 p"
+GZIP_MAGIC = b"\x1f\x8b"
+
+session = create_session(pool_size=4)
+
+
+class StreamedDataset:
+    # One Eurostat slice held as typed arrays.
+    #
+    # values[row, period] is float64 with periods in calendar order; codes[row, d]
+    # is the position of the row's label for dimension d in categories[d].
+
+    def __init__(self, dimensions, categories, codes, periods, values):
+        self.dimensions = dimensions
+        self.categories = categories
+        self.codes = codes
+        self.periods = periods
+        self.values = values
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.codes.nbytes
+
+    def frames(self, group="coicop", label="geo"):
+        # {f"d_{coicop}": geo x period frame}, the same shape as prepare_data()
+        group_dim, label_dim = self.dimensions.index(group), self.dimensions.index(label)
+        labels = np.asarray(self.categories[label_dim], dtype=object)
+        columns = pd.Index(self.periods)
+        frames = {}
+        for code, name in enumerate(self.categories[group_dim]):
+            rows = np.flatnonzero(self.codes[:, group_dim] == code)
+            if not len(rows):
+                continue
+            # The API sorts rows by dimension, so a category is usually one contiguous view
+            if rows[-1] - rows[0] + 1 == len(rows):
+                block = self.values[rows[0]:rows[-1] + 1]
+            else:
+                block = self.values[rows]
+            index = pd.Index(labels[self.codes[rows, label_dim]], name=INDEX_NAME)
+            frames[f"d_{name}"] = pd.DataFrame(block, index=index, columns=columns, copy=False)
+        return frames
+
+    @staticmethod
+    def concat(datasets):
+        # Sections of several requests: union of periods and labels, rows stacked
+        if len(datasets) == 1:
+            return datasets[0]
+        first = datasets[0]
+        periods = sorted(set().union(*(dataset.periods for dataset in datasets)))
+        categories = [list(dict.fromkeys(c for dataset in datasets for c in dataset.categories[d]))
+                      for d in range(len(first.dimensions))]
+        positions = [{c: i for i, c in enumerate(cats)} for cats in categories]
+
+        codes, values = [], []
+        for dataset in datasets:
+            remap = [np.array([positions[d][c] for c in dataset.categories[d]], dtype=np.int32)
+                     for d in range(len(first.dimensions))]
+            codes.append(np.column_stack([remap[d][dataset.codes[:, d]] for d in range(len(remap))])
+                         if len(dataset.codes) else dataset.codes)
+            if dataset.periods == periods:
+                values.append(dataset.values)
+            else:
+                block = np.full((len(dataset.values), len(periods)), np.nan, dtype=np.float64)
+                block[:, np.searchsorted(periods, dataset.periods)] = dataset.values
+                values.append(block)
+        return StreamedDataset(first.dimensions, categories, np.concatenate(codes), periods, np.concatenate(values))
+
+
+class _TSVSection:
+    # Rows of one response; every chunk_rows rows are handed to the C CSV
+    # parser at once and kept as one float64 block
+
+    def __init__(self, header, chunk_rows=CHUNK_ROWS):
+        label, *periods = header.split("\t")
+        self.dimensions = [dim.strip() for dim in label.split("\\")[0].split(",")]
+        periods = [period.strip() for period in periods]
+        self.order = np.argsort(periods, kind="stable")
+        self.periods = [periods[i] for i in self.order]
+        self.chunk_rows = chunk_rows
+        self.lookups = [{} for _ in self.dimensions]  # label -> code, per dimension
+        self.blocks, self.code_blocks = [], []
+        self.pending = []
+
+    def add(self, line):
+        self.pending.append(line)
+        if len(self.pending) == self.chunk_rows:
+            self._parse_pending()
+
+    def _parse_pending(self):
+        codes = np.empty((len(self.pending), len(self.dimensions)), dtype=np.int32)
+        cells = []
+        for row, line in enumerate(self.pending):
+            labels, _, values = line.partition("\t")
+            for dim, label in enumerate(labels.split(",")):
+                lookup = self.lookups[dim]
+                codes[row, dim] = lookup.setdefault(label.strip(), len(lookup))
+            cells.append(values)
+        self.pending = []
+
+        # "101.23 p" -> "101.23", ": c" -> ":" (missing); most cells carry no flag
+        text = "\n".join(cells)
+        if FLAGS.search(text):
+            text = FLAGS.sub("", text)
+        text = text.replace(" ", "")
+        block = pd.read_csv(
+            io.StringIO(text), sep="\t", header=None, names=range(len(self.periods)),
+            dtype=np.float64, na_values=[":"], keep_default_na=False
+        ).to_numpy()
+        self.blocks.append(block[:, self.order])
+        self.code_blocks.append(codes)
+
+    def finish(self):
+        if self.pending:
+            self._parse_pending()
+        n_periods, n_dims = len(self.periods), len(self.dimensions)
+        values = np.concatenate(self.blocks) if self.blocks else np.empty((0, n_periods), dtype=np.float64)
+        codes = np.concatenate(self.code_blocks) if self.code_blocks else np.empty((0, n_dims), dtype=np.int32)
+        self.blocks = self.code_blocks = None
+        return StreamedDataset(self.dimensions, [list(lookup) for lookup in self.lookups], codes, self.periods, values)
+
+
+def parse_tsv(lines, chunk_rows=CHUNK_ROWS):
+    # Eurostat TSV lines (one or more responses, each with its header) -> StreamedDataset
+    sections, section = [], None
+    for line in lines:
+        if not line.strip():
+            continue
+        if "\\" in line.split("\t", 1)[0]:
+            if section is not None:
+                sections.append(section.finish())
+            section = _TSVSection(line, chunk_rows)
+        elif section is None:
+            raise ValueError("TSV row before its header")
+        else:
+            section.add(line)
+    if section is not None:
+        sections.append(section.finish())
+    if not sections:
+        raise ValueError("Empty Eurostat response")
+    return StreamedDataset.concat(sections)
+
+
+# ------------------ Requests ------------------
+@lru_cache(maxsize=None)
+def dimension_order(dataset_code):
+    # Dimension ids in SDMX key order, e.g. ['freq', 'unit', 'coicop', 'geo']
+    return tuple(eurostat.get_pars(dataset_code))
+
+
+def query_keys(dimensions, filter_pars, max_length=MAX_KEY_LENGTH):
+    # One SDMX key OR-ing every filter value ("M.I15.CP00+CP01.DE+FR"); the
+    # longest value list is halved until each key fits in a URL
+    values = []
+    for dim in dimensions:
+        value = filter_pars.get(dim, [])
+        values.append([str(v) for v in (value if isinstance(value, (list, tuple)) else [value])])
+
+    pending, keys = [values], []
+    while pending:
+        parts = pending.pop(0)
+        key = ".".join("+".join(part) for part in parts)
+        longest = max(range(len(parts)), key=lambda i: len(parts[i]))
+        if len(key) <= max_length or len(parts[longest]) < 2:
+            keys.append(key)
+            continue
+        half = len(parts[longest]) // 2
+        for chunk in (parts[longest][:half], parts[longest][half:]):
+            pending.append(parts[:longest] + [chunk] + parts[longest + 1:])
+    return keys
+
+
+def iter_lines(chunks):
+    # TSV body -> text lines as the bytes arrive. The payload is gzip
+    # (compressed=true), but when the server also sets Content-Encoding
+    # urllib3 may already have inflated it, so the first bytes decide.
+    chunks = iter(chunks)
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= len(GZIP_MAGIC):
+            break
+    inflate = zlib.decompressobj(16 + zlib.MAX_WBITS) if head.startswith(GZIP_MAGIC) else None
+    decode = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    for chunk in itertools.chain([head], chunks):
+        pending += decode.decode(inflate.decompress(chunk) if inflate else chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decode.decode(inflate.flush() if inflate else b"", final=True)
+    for line in pending.split("\n"):
+        yield line.rstrip("\r")
+
+
+def stream_tsv(dataset_code, filter_pars, timeout=120):
+    # Lines of every response for the slice; each response starts with its header
+    dimensions = dimension_order(dataset_code)
+    params = {"format": "TSV", "compressed": "true"}
+    for name in ("startPeriod", "endPeriod"):
+        if name in filter_pars:
+            params[name] = str(filter_pars[name])
+    for key in query_keys(dimensions, filter_pars):
+        url = f"{EUROSTAT_ENTRYPOINT.rstrip('/')}/data/{dataset_code}/{key}"
+        with session.get(url, params=params, headers={"Accept": "*/*"}, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            yield from iter_lines(response.iter_content(1 << 16))
+
+
+def stream_dataset(dataset_code, filter_pars, chunk_rows=CHUNK_ROWS):
+    print(f"🌍 Streaming Eurostat dataset {dataset_code}")
+    dataset = parse_tsv(stream_tsv(dataset_code, filter_pars), chunk_rows)
+    print(f"✅ Parsed {len(dataset.values)} series x {len(dataset.periods)} periods ({dataset.nbytes / 2**20:.1f} MiB)")
+    return dataset
@@ -0,0 +1,182 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+
+import pandas as pd
+
+from data_retrieval import DataRetrieval
+from series_store import shared_store
+from vintage_store import vintage_store
+
+DEFAULT_WORKBOOK = "DATA FOR ECB.xlsx"
+DEFAULT_OUTPUT = "ecb_dashboard_data.pkl"  # the catalogue the dashboards load
+
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def frame_digest(df):
+    sha = hashlib.sha1(repr(list(df.columns)).encode())
+    sha.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return sha.hexdigest()
+
+
+def row_hashes(df):
+    # KEY -> hash of the whole catalogue row, Sheet column left out
+    hashes = pd.util.hash_pandas_object(df.drop(columns="Sheet"), index=False).to_numpy()
+    return {key: format(int(h), "016x") for key, h in zip(df["KEY"], hashes)}
+
+
+def normalize_sheet(df, sheet_name):
+    # Catalogue rows of one sheet: stripped keys, one row per key, section
+    # headings (rows without a key) left out
+    df = df.rename(columns={col: "KEY" for col in df.columns if str(col).strip().lower() == "key"})
+    if "KEY" not in df.columns:
+        return None
+    df = df.dropna(subset=["KEY"]).copy()
+    df["KEY"] = df["KEY"].astype(str).str.strip()
+    df = df[df["KEY"] != ""].drop_duplicates(subset="KEY")
+    df.insert(0, "Sheet", sheet_name)
+    return df.reset_index(drop=True)
+
+
+class CatalogueIngestion:
+    # Compiles the reference workbook into the catalogue pickle the dashboards
+    # load: one frame with Sheet / Name / KEY / ... columns, one row per key, so
+    # DataRetrieval reads it as is instead of concatenating sheets.
+    #
+    # A manifest next to the output keeps the workbook digest, one digest per
+    # sheet and one hash per catalogue row. An unchanged workbook is not parsed
+    # beyond its digest, unchanged sheets are carried over from the previous
+    # catalogue, and the report lists the rows that were added, removed or changed.
+
+    def __init__(self, workbook_path=DEFAULT_WORKBOOK, output_path=DEFAULT_OUTPUT, manifest_path=None):
+        self.workbook_path = workbook_path
+        self.output_path = output_path
+        self.manifest_path = manifest_path or os.path.splitext(output_path)[0] + ".manifest.json"
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            manifest = {}
+        return {"workbook_digest": None, "sheets": {}, "rows": {}, **manifest}
+
+    def load_compiled(self):
+        try:
+            with open(self.output_path, "rb") as f:
+                compiled = pickle.load(f)
+        except (FileNotFoundError, pickle.UnpicklingError, EOFError):
+            return None
+        # Catalogues written in the older {sheet: frame} layout are rebuilt
+        if isinstance(compiled, pd.DataFrame) and {"Sheet", "KEY"} <= set(compiled.columns):
+            return compiled
+        return None
+
+    def build(self, force=False):
+        # Returns a change report: added / removed / changed keys, rebuilt sheets and every catalogue key
+        manifest = self.load_manifest()
+        compiled = None if force else self.load_compiled()
+        digest = file_digest(self.workbook_path)
+        report = {"added": [], "removed": [], "changed": [], "rebuilt_sheets": [], "keys": []}
+
+        if compiled is not None and digest == manifest["workbook_digest"]:
+            report["keys"] = list(compiled["KEY"])
+            print("✅ Catalogue is up to date.")
+            return report
+
+        old_rows = manifest["rows"] if compiled is not None else {}  # without a catalogue every key is new
+        parts, sheet_digests, rows = [], {}, {}
+        for sheet_name, raw in pd.read_excel(self.workbook_path, sheet_name=None).items():
+            sheet_digests[sheet_name] = frame_digest(raw)
+            if compiled is not None and manifest["sheets"].get(sheet_name) == sheet_digests[sheet_name]:
+                part = compiled[compiled["Sheet"] == sheet_name]
+                part_rows = {key: old_rows[key] for key in part["KEY"] if key in old_rows}
+            else:
+                part = normalize_sheet(raw, sheet_name)
+                if part is None:
+                    continue
+                part_rows = row_hashes(part)
+                report["rebuilt_sheets"].append(sheet_name)
+            parts.append(part)
+            for key, row_hash in part_rows.items():
+                rows.setdefault(key, row_hash)  # first sheet wins, as in the key-name mapping
+
+        catalogue = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["Sheet", "Name", "KEY"])
+        catalogue = catalogue.drop_duplicates(subset="KEY").reset_index(drop=True)
+
+        report["added"] = [key for key in rows if key not in old_rows]
+        report["removed"] = [key for key in old_rows if key not in rows]
+        report["changed"] = [key for key in rows if key in old_rows and rows[key] != old_rows[key]]
+        report["keys"] = list(catalogue["KEY"])
+
+        self._write(catalogue, {"workbook_digest": digest, "sheets": sheet_digests, "rows": rows})
+        print(
+            f"✅ Catalogue compiled: {len(rows)} keys, {len(report['added'])} added, "
+            f"{len(report['removed'])} removed, {len(report['changed'])} changed "
+            f"({len(report['rebuilt_sheets'])} of {len(sheet_digests)} sheets rebuilt)."
+        )
+        return report
+
+    def _write(self, catalogue, manifest):
+        # Write then rename so readers never see a half-written catalogue
+        tmp_path = self.output_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(catalogue, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.output_path)
+        with open(self.manifest_path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(self.manifest_path + ".tmp", self.manifest_path)
+
+    def sync_series(self, report, store=shared_store, namespace="ecb"):
+        # Drop removed keys and fetch the keys the store lacks (the added ones);
+        # rows that only changed in the workbook (Name, LINK, ...) keep their
+        # series and get their names from the new catalogue without a download
+        retriever = DataRetrieval(self.output_path, vintages=vintage_store)
+        current = store.manifest(namespace)
+        requested = set(current["extra"].get("requested_keys", [])) if current else set()
+        if current is not None:
+            retriever.attach_store(store, [], namespace)
+
+        for key in report["removed"]:
+            retriever.drop_series(key)
+        for key in report["changed"]:
+            if key in retriever.DICT_data:
+                retriever.metadata.register(key, retriever.DICT_data.peek(key))
+        missing = [key for key in report["keys"] if key not in retriever.DICT_data]
+        if missing:
+            retriever.fetch_many(missing)
+        elif not report["removed"] and not report["changed"]:
+            print("✅ Shared store already holds every catalogue key.")
+            return retriever
+
+        requested = (requested - set(report["removed"])) | set(report["keys"])
+        retriever.publish_series(store, sorted(requested), namespace)
+        return retriever
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the ECB reference workbook and fetch new series.")
+    parser.add_argument("--workbook", default=DEFAULT_WORKBOOK)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--namespace", default="ecb", help="shared store namespace for the fetched series")
+    parser.add_argument("--force", action="store_true", help="rebuild every sheet, even if the workbook is unchanged")
+    parser.add_argument("--no-fetch", action="store_true", help="only compile the catalogue")
+    args = parser.parse_args()
+
+    ingestion = CatalogueIngestion(args.workbook, args.output)
+    report = ingestion.build(force=args.force)
+    if not args.no_fetch:
+        ingestion.sync_series(report, namespace=args.namespace)
+
+
+if __name__ == "__main__":
+    main()
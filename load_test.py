@@ -0,0 +1,306 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from upstream_stubs import install_stubs
+
+# Simulated sessions drive the real pages through Streamlit's AppTest with
+# stubbed ECB / Eurostat clients, so the numbers measure the app, not the network.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+ECB_CATALOGUE = "ecb_dashboard_data.pkl"
+DASHBOARD_SCRIPT = f"""
+import streamlit as st
+from ecb_dashboard import Dashboard
+
+@st.cache_resource
+def load_dashboard(pickle_file_path):
+    return Dashboard(pickle_file_path)
+
+load_dashboard("{ECB_CATALOGUE}").run()
+"""
+
+
+# ------------------ Scripted interactions ------------------
+# Every action raises LookupError when its widget is not on the page, so a
+# step that could not run is reported as failed instead of silently skipped.
+def find(widgets, label):
+    widget = next((w for w in widgets if w.label == label), None)
+    if widget is None:
+        raise LookupError(f"no widget labelled '{label}' on the page")
+    return widget
+
+
+def options_of(widget, skip_first=False):
+    options = list(widget.options)
+    if skip_first and len(options) > 1:
+        options = options[1:]
+    if not options:
+        raise LookupError(f"widget '{widget.label}' has no options")
+    return options
+
+
+def choose(widgets, label, rng, skip_first=False):
+    # Pick a random option of the labelled widget
+    widget = find(widgets, label)
+    widget.set_value(rng.choice(options_of(widget, skip_first)))
+
+
+def select_index(widgets, label, index):
+    widget = find(widgets, label)
+    options = options_of(widget)
+    if len(options) <= index:
+        raise LookupError(f"widget '{label}' has no option {index}")
+    widget.set_value(options[index])
+
+
+def choose_many(widgets, label, rng, k=1):
+    widget = find(widgets, label)
+    options = options_of(widget)
+    widget.set_value(rng.sample(options, min(k, len(options))))
+
+
+def set_slider(widgets, label, rng):
+    widget = find(widgets, label)
+    widget.set_value(rng.randint(widget.min, widget.max))
+
+
+def click_toggle(widgets, rng):
+    if not len(widgets):
+        raise LookupError("no toggle on the page")
+    widget = rng.choice(list(widgets))
+    widget.set_value(not widget.value)
+
+
+SCENARIOS = {
+    # name: (how to build the AppTest, [(step, action(at, rng))])
+    "dashboard": (
+        lambda: AppTest.from_string(DASHBOARD_SCRIPT),
+        [
+            ("select dataset", lambda at, rng: choose(at.sidebar.selectbox, "Select Dataset", rng)),
+            ("add comparison", lambda at, rng: choose_many(at.sidebar.multiselect, "Compare with:", rng)),
+            ("view option", lambda at, rng: choose(at.radio, "View Option", rng, skip_first=True)),
+            ("sub option", lambda at, rng: choose(at.selectbox, "Sub Option", rng)),
+            ("chart type", lambda at, rng: choose(at.selectbox, "Chart Type", rng)),
+            ("section", lambda at, rng: choose(at.radio, "Section", rng)),
+            ("relationships", lambda at, rng: select_index(at.radio, "Section", 4)),
+            ("rolling window", lambda at, rng: set_slider(at.slider, "Rolling Window (periods)", rng)),
+        ],
+    ),
+    "eurostat_dashboard": (
+        lambda: AppTest.from_file(os.path.join(ROOT, "eurostat_dashboard.py")),
+        [
+            ("open Eurostat page", lambda at, rng: select_index(at.sidebar.radio, "Select a page", 1)),
+            ("start year", lambda at, rng: set_slider(at.sidebar.slider, "Start Year for Plotting", rng)),
+            ("percentile charts", lambda at, rng: select_index(at.radio, "View", 0)),
+            ("expand category", lambda at, rng: click_toggle(at.toggle, rng)),
+            ("view", lambda at, rng: choose(at.radio, "View", rng)),
+            ("moving average", lambda at, rng: set_slider(at.sidebar.slider, "Moving Avg. Period (months)", rng)),
+            ("back to ECB page", lambda at, rng: select_index(at.sidebar.radio, "Select a page", 0)),
+            ("select dataset", lambda at, rng: choose(at.sidebar.selectbox, "Select Dataset", rng)),
+        ],
+    ),
+}
+
+
+# ------------------ Runner ------------------
+# AppTest swaps a mock Runtime and config in and out around each run, so runs
+# in one process must not overlap. Concurrency therefore comes from processes:
+# by default every session gets its own. Sessions sharing a process take turns,
+# and the time they wait for their turn is part of the measured rerun.
+RUN_LOCK = threading.Lock()
+
+
+def timed_run(at, timeout):
+    start = time.perf_counter()
+    with RUN_LOCK:
+        at.run(timeout=timeout)
+    return time.perf_counter() - start
+
+
+def run_session(scenario, session_id, rounds, timeout, seed):
+    # One simulated user: initial load, then the scripted steps `rounds` times.
+    # Records are (step, seconds or None if the step failed, exceptions).
+    build, steps = SCENARIOS[scenario]
+    rng = random.Random(seed * 1000 + session_id)
+    at = build()
+    records = [("initial load", timed_run(at, timeout), len(at.exception))]
+    for _ in range(rounds):
+        for step, action in steps:
+            try:
+                action(at, rng)
+            except Exception as e:
+                print(f"❌ Session {session_id}: step '{step}' failed: {e}")
+                records.append((step, None, 0))
+                continue
+            records.append((step, timed_run(at, timeout), len(at.exception)))
+    return records
+
+
+def run_worker(scenario, session_ids, rounds, timeout, latency, seed, worker_id, scratch_dir=None):
+    # One process: the given sessions share the process caches, like one server
+    os.chdir(ROOT)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    if scratch_dir is not None:
+        tempfile.tempdir = scratch_dir  # spill directories land in the run's scratch directory
+    install_stubs(latency)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(session_ids)) as pool:
+        results = list(pool.map(
+            lambda session_id: run_session(scenario, session_id, rounds, timeout, seed), session_ids
+        ))
+    return {
+        "worker": worker_id,
+        "pid": os.getpid(),
+        "elapsed": time.perf_counter() - start,
+        "records": [record for session in results for record in session],
+        "rss_mb": current_rss_mb(),
+        "peak_rss_mb": peak_rss_mb(),
+        "sessions": len(session_ids),
+        "threads": threading.active_count(),
+    }
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return float("nan")
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB elsewhere
+
+
+def summarize(scenario, workers, wall_time):
+    records = pd.DataFrame(
+        [record for worker in workers for record in worker["records"]],
+        columns=["Step", "Seconds", "Exceptions"]
+    )
+    records["Seconds"] = records["Seconds"].astype(float)
+
+    def latency_row(frame):
+        seconds = frame["Seconds"].dropna().to_numpy()
+        percentile = (lambda q: np.percentile(seconds, q) * 1000) if len(seconds) else (lambda q: float("nan"))
+        return pd.Series({
+            "Reruns": len(seconds),
+            "p50 (ms)": percentile(50),
+            "p95 (ms)": percentile(95),
+            "p99 (ms)": percentile(99),
+            "Max (ms)": seconds.max() * 1000 if len(seconds) else float("nan"),
+            "Exceptions": int(frame["Exceptions"].sum()),
+            "Failed": int(frame["Seconds"].isna().sum()),
+        })
+
+    by_step = records.groupby("Step", sort=False).apply(latency_row, include_groups=False)
+    overall = latency_row(records)
+    processes = pd.DataFrame([
+        {"Worker": w["worker"], "PID": w["pid"], "Sessions": w["sessions"], "Elapsed (s)": w["elapsed"],
+         "RSS (MiB)": w["rss_mb"], "Peak RSS (MiB)": w["peak_rss_mb"]}
+        for w in workers
+    ])
+    sessions = sum(w["sessions"] for w in workers)
+    return {
+        "scenario": scenario,
+        "sessions": sessions,
+        "process_count": len(workers),
+        "measures": (
+            f"{sessions} sessions at once, one per process" if sessions == len(workers) else
+            f"{sessions} sessions over {len(workers)} processes; reruns include the wait for their process's turn"
+        ),
+        "wall_seconds": wall_time,
+        "reruns": int(overall["Reruns"]),
+        "throughput_per_s": overall["Reruns"] / wall_time if wall_time else float("nan"),
+        "overall": overall.to_dict(),
+        "by_step": by_step.reset_index().to_dict(orient="records"),
+        "processes": processes.to_dict(orient="records"),
+    }
+
+
+def print_report(summary):
+    overall = summary["overall"]
+    print(f"\n📊 Scenario '{summary['scenario']}': {summary['reruns']} reruns in {summary['wall_seconds']:.1f}s "
+          f"({summary['throughput_per_s']:.2f} reruns/s)")
+    print(f"   {summary['measures']}")
+    print(f"   p50 {overall['p50 (ms)']:.0f} ms | p95 {overall['p95 (ms)']:.0f} ms | "
+          f"p99 {overall['p99 (ms)']:.0f} ms | exceptions {int(overall['Exceptions'])} | "
+          f"failed steps {int(overall['Failed'])}")
+    print(pd.DataFrame(summary["by_step"]).round(1).to_string(index=False))
+    print(pd.DataFrame(summary["processes"]).round(1).to_string(index=False))
+
+
+def run_load_test(scenario, processes=None, sessions=10, rounds=2, timeout=300, latency=0.0, seed=0, scratch_dir=None):
+    # `sessions` users at once, dealt round-robin over `processes` (one each by default)
+    processes = min(processes or sessions, sessions)
+    assignments = [list(range(worker_id, sessions, processes)) for worker_id in range(processes)]
+    start = time.perf_counter()
+    if processes == 1:
+        workers = [run_worker(scenario, assignments[0], rounds, timeout, latency, seed, 0, scratch_dir)]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [
+                pool.submit(run_worker, scenario, session_ids, rounds, timeout, latency, seed, worker_id, scratch_dir)
+                for worker_id, session_ids in enumerate(assignments)
+            ]
+            workers = [future.result() for future in futures]
+    return summarize(scenario, workers, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the dashboards with many simulated sessions.")
+    parser.add_argument("--scenario", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent sessions in total")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="server processes to spread the sessions over (default: one per session)")
+    parser.add_argument("--rounds", type=int, default=2, help="passes over the scripted steps per session")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every stubbed data request")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds allowed per rerun")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the full report to this file")
+    args = parser.parse_args()
+
+    # Private stores so runs never read or replace the real shared series and
+    # vintages; everything the run writes (stores, spill files) is removed at the end
+    with tempfile.TemporaryDirectory(prefix="dashboard-load-test-") as scratch_dir:
+        os.environ.setdefault("DASHBOARD_STORE_DIR", os.path.join(scratch_dir, "store"))
+        os.environ.setdefault("DASHBOARD_VINTAGE_DIR", os.path.join(scratch_dir, "vintages"))
+        previous_tempdir = tempfile.tempdir
+        summaries = []
+        try:
+            for scenario in args.scenario:
+                summary = run_load_test(
+                    scenario, args.processes, args.sessions, args.rounds, args.timeout, args.latency, args.seed,
+                    scratch_dir
+                )
+                print_report(summary)
+                summaries.append(summary)
+        finally:
+            tempfile.tempdir = previous_tempdir
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summaries, f, indent=1, default=float)
+        print(f"✅ Report written to {args.json}")
+    if any(summary["overall"]["Failed"] or summary["overall"]["Exceptions"] for summary in summaries):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
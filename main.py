@@ -1,10 +1,21 @@
 import streamlit as st
 from data_retrieval import DataRetrieval
 from data_visualization import DataVisualization
+from catalogue_index import CatalogueIndex
+
+SELECTOR_LIMIT = 200  # options shown per selector; the search box narrows the rest
+
+
+@st.cache_resource
+def load_catalogue(pickle_file_path):
+    # Reference table and label index are built once per process
+    retriever = DataRetrieval(pickle_file_path)
+    index = CatalogueIndex()
+    for full_key in retriever.DICT_data:
+        # Map cleaned label (without key) to full key
+        index.add(full_key, label=full_key.split('[')[0].strip(), name=retriever.get_name_from_key(full_key))
+    return retriever, index
 
-# Load data
-data_retriever = DataRetrieval("ecb_dashboard_data.pkl")
-df_dict = data_retriever.DICT_data
 
 # Set up page layout
 st.set_page_config(page_title="Uncompromised Research Dashboard", layout="wide")
@@ -14,25 +25,23 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
+# Load data
+data_retriever, catalogue_index = load_catalogue("ecb_dashboard_data.pkl")
+df_dict = data_retriever.DICT_data
+
 if not df_dict:
     st.error("❌ No data loaded from the pickle file.")
 else:
-    # Map cleaned label (without key) to full key
-    label_to_key = {}
-    for full_key in df_dict:
-        clean_label = full_key.split('[')[0].strip()
-        counter = 2
-        original_label = clean_label
-        while clean_label in label_to_key:
-            clean_label = f"{original_label} ({counter})"
-            counter += 1
-        label_to_key[clean_label] = full_key
-
-    display_labels = list(label_to_key.keys())
-
-    if not display_labels:
+    label_to_key = catalogue_index.label_to_key
+
+    if not label_to_key:
         st.warning("⚠️ No valid datasets available.")
     else:
+        search_query = st.text_input("Search Datasets:")
+        display_labels = catalogue_index.search_labels(search_query, limit=SELECTOR_LIMIT)
+        if not display_labels:
+            st.warning("⚠️ No datasets match the search.")
+            st.stop()
         selected_label = st.selectbox("Select Dataset:", display_labels)
         compare_label = st.selectbox("Compare with Additional Datasets:", ["None"] + display_labels)
 
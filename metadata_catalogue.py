@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+# Catalogue field -> ECB columns to read it from; the first non-empty one wins
+METADATA_FIELDS = {
+    "title": ["TITLE", "TITLE_EN", "Series_title"],
+    "title_en": ["TITLE_EN"],
+    "title_original": ["TITLE"],
+    "title_compl": ["TITLE_COMPL"],
+    "frequency": ["FREQ"],
+    "ref_area": ["REF_AREA"],
+    "adjustment": ["SEASONAL_ADJUST_DESC", "SEASONAL_ADJUST"],
+    "unit": ["UNIT"],
+    "unit_descr": ["UNIT_DESCR"],
+    "source": ["SOURCE"],
+    "status": ["OBS_STATUS_DESC", "OBS_STATUS"],
+}
+OBSERVATION_COLUMNS = ("TIME_PERIOD", "OBS_VALUE")
+RECORD_FIELDS = list(METADATA_FIELDS) + ["observed"]  # observed: "yes" when the frame holds observations
+
+
+def first_value(df, column):
+    # First non-null value of a column, stripped; None when there is none
+    if column not in df.columns:
+        return None
+    values = df[column]
+    mask = values.notna().to_numpy()
+    if not mask.any():
+        return None
+    value = str(values.iloc[int(np.argmax(mask))]).strip()
+    return value or None
+
+
+class MetadataCatalogue:
+    # Per-series metadata extracted once when a series is fetched.
+    #
+    # Titles, units, frequency etc. are constant per series, so rendering code
+    # reads them from here instead of scanning the per-observation columns.
+
+    def __init__(self):
+        self._records = {}  # key -> {field: str or None}
+        self._frame = None
+
+    def __contains__(self, key):
+        return key in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+    @staticmethod
+    def extract(df):
+        record = {}
+        for field, columns in METADATA_FIELDS.items():
+            value = None
+            for column in columns:
+                value = first_value(df, column)
+                if value is not None:
+                    break
+            record[field] = value
+        record["observed"] = "yes" if set(OBSERVATION_COLUMNS) <= set(df.columns) else None
+        return record
+
+    def register(self, key, df):
+        self._records[key] = self.extract(df)
+        self._frame = None
+        return self._records[key]
+
+    def remove(self, key):
+        if self._records.pop(key, None) is not None:
+            self._frame = None
+
+    def get(self, key):
+        return self._records.get(key, dict.fromkeys(RECORD_FIELDS))
+
+    def field(self, key, name, default=None):
+        value = self._records.get(key, {}).get(name)
+        return default if value is None else value
+
+    def observed(self, key):
+        # True / False from the catalogue, None when the key was never registered
+        # or comes from a table published before the flag existed
+        record = self._records.get(key)
+        if record is None or "observed" not in record:
+            return None
+        return record["observed"] == "yes"
+
+    def to_frame(self):
+        # Typed table: one row per series key, string columns
+        if self._frame is None:
+            frame = pd.DataFrame.from_dict(self._records, orient="index", columns=RECORD_FIELDS)
+            frame.index.name = "KEY"
+            self._frame = frame.astype("string")
+        return self._frame
+
+    def load_frame(self, frame):
+        # Inverse of to_frame().reset_index(); used when series come from the shared store
+        frame = frame.astype("object").where(frame.notna(), None)
+        for row in frame.to_dict(orient="records"):
+            key = row.pop("KEY")
+            fields = RECORD_FIELDS if "observed" in row else METADATA_FIELDS
+            self._records[key] = {field: row.get(field) for field in fields}
+        self._frame = None
@@ -0,0 +1,142 @@
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+SDMX_ENTRYPOINT = os.environ.get("ECB_SDMX_URL", "https://data-api.ecb.europa.eu")
+MAX_KEYS_PER_QUERY = 50  # keeps the OR-ed URL well under server limits
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def create_session(pool_size=8, retries=4, backoff_factor=0.5):
+    # Keep-alive session with a connection pool, gzip and exponential backoff
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=("GET",),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Accept": "text/csv",
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive",
+    })
+    return session
+
+
+def group_keys(keys, max_keys=MAX_KEYS_PER_QUERY):
+    # Merge series keys of one dataflow into multi-series queries.
+    #
+    # Keys that differ in exactly one dimension are OR-ed on that dimension
+    # ("M.U2.N.000000+XEF000.4.INX"), so each query returns exactly the
+    # requested series. Returns [(dataflow, query key, [member keys])].
+    flows = {}
+    for key in dict.fromkeys(keys):
+        flow, _, rest = key.partition(".")
+        dims = tuple(rest.split("."))
+        flows.setdefault((flow, len(dims)), []).append(dims)
+
+    queries = []
+    for (flow, n_dims), remaining in flows.items():
+        used_dims = set()
+        while remaining:
+            # Dimension whose OR-ing leaves the fewest queries
+            best_dim, best_groups = None, None
+            for dim in range(n_dims):
+                if dim in used_dims:
+                    continue
+                groups = {}
+                for dims in remaining:
+                    groups.setdefault(dims[:dim] + dims[dim + 1:], []).append(dims)
+                if best_groups is None or len(groups) < len(best_groups):
+                    best_dim, best_groups = dim, groups
+
+            if best_groups is None or all(len(group) == 1 for group in best_groups.values()):
+                queries.extend((flow, ".".join(dims), [f"{flow}.{'.'.join(dims)}"]) for dims in remaining)
+                break
+
+            used_dims.add(best_dim)
+            leftovers = []
+            for rest, group in best_groups.items():
+                if len(group) == 1:
+                    leftovers.extend(group)
+                    continue
+                for start in range(0, len(group), max_keys):
+                    chunk = group[start:start + max_keys]
+                    values = "+".join(dims[best_dim] for dims in chunk)
+                    query = ".".join(rest[:best_dim] + (values,) + rest[best_dim:])
+                    queries.append((flow, query, [f"{flow}.{'.'.join(dims)}" for dims in chunk]))
+            remaining = leftovers
+    return queries
+
+
+class SDMXBatchFetcher:
+    # Fetches many ECB series with few requests over one pooled session.
+
+    def __init__(self, session=None, entrypoint=SDMX_ENTRYPOINT, max_keys=MAX_KEYS_PER_QUERY,
+                 max_workers=4, timeout=60):
+        self.session = session or create_session(pool_size=max_workers * 2)
+        self.entrypoint = entrypoint.rstrip("/")
+        self.max_keys = max_keys
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.metrics = {"requests": 0, "series": 0, "failed_queries": 0, "bytes": 0}
+
+    def query_url(self, flow, query, start_date=None):
+        url = f"{self.entrypoint}/service/data/{flow}/{query}?format=csvdata"
+        if start_date:
+            url += f"&startPeriod={start_date}"
+        return url
+
+    def fetch_query(self, flow, query, start_date=None):
+        response = self.session.get(self.query_url(flow, query, start_date), timeout=self.timeout)
+        with self._lock:
+            self.metrics["requests"] += 1
+            self.metrics["bytes"] += len(response.content)
+        if response.status_code == 404:
+            return pd.DataFrame()  # no series matched
+        response.raise_for_status()
+        return pd.read_csv(io.BytesIO(response.content))
+
+    def fetch(self, keys, start_date=None):
+        # Returns {key: DataFrame}; keys missing from the result were not returned
+        queries = group_keys(keys, self.max_keys)
+        print(f"🌍 Fetching {len(set(keys))} ECB series in {len(queries)} batched requests")
+
+        def run(query):
+            flow, query_key, members = query
+            try:
+                return members, self.fetch_query(flow, query_key, start_date)
+            except Exception as e:
+                print(f"❌ Batched request failed for {flow}/{query_key}: {e}")
+                with self._lock:
+                    self.metrics["failed_queries"] += 1
+                return members, None
+
+        frames = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for members, df in pool.map(run, queries):
+                if df is None or df.empty or "KEY" not in df.columns:
+                    continue
+                wanted = set(members)
+                for key, frame in df.groupby("KEY", sort=False):
+                    if key in wanted:
+                        frames[key] = frame.reset_index(drop=True)
+        with self._lock:
+            self.metrics["series"] += len(frames)
+        return frames
+
+
+# Shared by every session in the process: one connection pool to the ECB
+default_fetcher = SDMXBatchFetcher()
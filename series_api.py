@@ -0,0 +1,358 @@
+import argparse
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow responses are only offered when pyarrow is installed
+    pa = None
+
+from alignment import FREQ_ORDER, RESAMPLE_RULES, align_series
+from cross_series import TRANSFORMS
+from data_retrieval import DataRetrieval
+from eurostat_page import AVAILABLE_GEOS, COICOP_OPTIONS, DATASET_CODE, MEDIANS_FRAME, UNIT, load_processed_data
+from series_store import shared_store
+from vintage_store import vintage_store
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CATALOGUE = "ecb_dashboard_data.pkl"
+RESPONSE_CACHE_SIZE = 256  # rendered bodies kept per process
+GZIP_MIN_BYTES = 1024  # smaller bodies are sent uncompressed
+CONTENT_TYPES = {
+    "json": "application/json",
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+class NotFound(Exception):
+    pass
+
+
+def negotiate_format(accept):
+    accept = accept.lower()
+    if "text/csv" in accept:
+        return "csv"
+    if "arrow" in accept:
+        return "arrow"
+    return "json"
+
+
+def serialize(frame, fmt):
+    if fmt == "csv":
+        return frame.to_csv(index=False).encode()
+    if fmt == "json":
+        return frame.to_json(orient="records", date_format="iso").encode()
+    if fmt == "arrow":
+        if pa is None:
+            raise ValueError("Arrow responses need pyarrow installed; ask for format=csv or format=json")
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    raise ValueError(f"Unknown format '{fmt}'; use one of {', '.join(CONTENT_TYPES)}")
+
+
+def split_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()] if value else []
+
+
+def parse_date(params, name):
+    value = params.get(name)
+    return pd.Timestamp(value) if value else None
+
+
+class Response:
+    def __init__(self, body, fmt):
+        self.body = body
+        self.content_type = CONTENT_TYPES[fmt]
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self._gzipped = None
+
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+
+class SeriesService:
+    # The dashboard's cached data for every other local consumer.
+    #
+    # ECB series are read from the shared store the dashboard publishes to and
+    # fetched upstream only when a key is missing (read-through); Eurostat
+    # percentile and median frames come from the same store. Rendered bodies
+    # are cached per data version, so repeats and If-None-Match revalidations
+    # cost neither recomputation nor serialisation.
+    #
+    #   /series                          catalogue of held series
+    #   /series/<key>                    ?start ?end ?as_of ?transform ?freq ?rule
+    #   /panel?keys=a,b                  aligned series, ?transform ?freq ?rule ?start ?end
+    #   /eurostat/percentiles            categories of the percentile frames
+    #   /eurostat/percentiles/<coicop>   ?geo ?start ?end ?namespace
+    #   /eurostat/medians                ?coicop ?geo ?namespace
+    #
+    # Every route takes ?format=json|csv|arrow or the matching Accept header.
+
+    def __init__(self, catalogue_path=DEFAULT_CATALOGUE, store=shared_store, namespace="ecb"):
+        self.store = store
+        self.namespace = namespace
+        self.retrieval = DataRetrieval(catalogue_path, vintages=vintage_store)
+        self._attached = None  # shared store version currently attached
+        self._attach_lock = threading.Lock()
+        self._fetch_lock = threading.Lock()  # one read-through fetch at a time: it updates the shared stores
+        self._responses = OrderedDict()
+        self._lock = threading.Lock()
+
+    def respond(self, path, params, fmt):
+        version, build = self.route(path, params)
+        cache_key = (path, tuple(sorted(params.items())), fmt, version)
+        with self._lock:
+            if cache_key in self._responses:
+                self._responses.move_to_end(cache_key)
+                return self._responses[cache_key]
+        response = Response(serialize(build(), fmt), fmt)
+        with self._lock:
+            self._responses[cache_key] = response
+            while len(self._responses) > RESPONSE_CACHE_SIZE:
+                self._responses.popitem(last=False)
+        return response
+
+    def route(self, path, params):
+        # Returns (data version, function building the response frame)
+        parts = [unquote(part) for part in path.strip("/").split("/") if part]
+        if parts == ["series"]:
+            return self.catalogue_view()
+        if len(parts) == 2 and parts[0] == "series":
+            return self.series_view([parts[1]], params, aligned=bool(params.get("transform")))
+        if parts == ["panel"]:
+            return self.series_view(split_list(params.get("keys")), params, aligned=True)
+        if parts[:1] == ["eurostat"] and len(parts) > 1:
+            return self.eurostat_view(parts[1:], params)
+        raise NotFound(f"No route for {path}")
+
+    # ------------------ ECB series ------------------
+    def refresh(self):
+        # Re-attach whenever the dashboard has published a new version
+        version = self.store.current_version(self.namespace)
+        if version is not None and version != self._attached:
+            with self._attach_lock:
+                if version != self._attached and self.retrieval.attach_store(self.store, [], self.namespace):
+                    self._attached = version
+        return self._attached
+
+    def series_frame(self, key, as_of=None):
+        # The frame and, for as_of requests, the fetch date of the vintage it was rebuilt from
+        if key not in self.retrieval.DICT_data:
+            with self._fetch_lock:
+                if key not in self.retrieval.DICT_data:
+                    self.retrieval.fetch_data(key)  # read-through to the upstream API
+        if key not in self.retrieval.DICT_data:
+            raise NotFound(f"Series {key} is not available")
+        if as_of is None:
+            return self.retrieval.DICT_data[key], None
+        vintage = self.retrieval.vintages.resolve(key, as_of)
+        snapshot = None if vintage is None else self.retrieval.series_as_of(key, vintage)
+        if snapshot is None:
+            raise NotFound(f"No vintage of {key} was fetched by {as_of}")
+        return snapshot, vintage
+
+    def catalogue_view(self):
+        def build():
+            # Every catalogue key, with the metadata of the ones already held
+            names = pd.DataFrame(list(self.retrieval.key_name_mapping.items()), columns=["KEY", "Name"])
+            held = self.retrieval.metadata.to_frame().reset_index()
+            return names.merge(held, on="KEY", how="outer")
+
+        # Counters only grow, so their sum changes whenever any series does
+        return (self.refresh(), sum(self.retrieval.series_versions.values())), build
+
+    def series_view(self, keys, params, aligned):
+        if not keys:
+            raise ValueError("Pass at least one series key")
+        start, end, as_of = parse_date(params, "start"), parse_date(params, "end"), parse_date(params, "as_of")
+        transform = params.get("transform") or "level"
+        freq = params.get("freq", "").upper() or None
+        rule = params.get("rule", "last")
+        if transform not in TRANSFORMS:
+            raise ValueError(f"Unknown transform '{transform}'; use one of {', '.join(TRANSFORMS)}")
+        if freq is not None and freq not in FREQ_ORDER:
+            raise ValueError(f"Unknown freq '{freq}'; use one of {', '.join(FREQ_ORDER)}")
+        if rule not in RESAMPLE_RULES:
+            raise ValueError(f"Unknown rule '{rule}'; use one of {', '.join(RESAMPLE_RULES)}")
+
+        self.refresh()
+        frames, vintages = {}, []
+        for key in keys:
+            frames[key], vintage = self.series_frame(key, as_of)
+            vintages.append(vintage)
+
+        def build():
+            if not aligned:
+                frame = frames[keys[0]]
+                dates = pd.to_datetime(frame["TIME_PERIOD"])
+                return frame[dates.between(start or dates.min(), end or dates.max())]
+            panel = align_series(
+                list(frames.items()),
+                freqs={key: self.retrieval.metadata.field(key, "frequency") for key in keys},
+                rules={key: rule for key in keys}, freq=freq
+            )
+            panel, _ = panel.transform(*TRANSFORMS[transform])
+            return panel.slice(start, end).to_frame().rename_axis("TIME_PERIOD").reset_index()
+
+        # A future as_of resolves to newer vintages as they are fetched, so key on the resolved ones
+        version = tuple(self.retrieval.series_versions.get(key, 0) for key in keys)
+        return (self._attached, version, tuple(vintages)), build
+
+    # ------------------ Eurostat ------------------
+    def eurostat_frames(self, params):
+        namespace = params.get("namespace")
+        if namespace is None:
+            # The dashboard's default selection, computed and published on a miss
+            filters = {"unit": UNIT, "coicop": COICOP_OPTIONS, "geo": AVAILABLE_GEOS}
+            percentiles, medians, data_version = load_processed_data(DATASET_CODE, filters)
+            return percentiles, medians, data_version
+        frames, version = self.store.load_versioned(namespace) if namespace.startswith("eurostat-") else (None, None)
+        if frames is None:
+            raise NotFound(f"No Eurostat results published under {namespace}")
+        percentiles = {key: df for key, df in frames.items() if key != MEDIANS_FRAME}
+        return percentiles, frames[MEDIANS_FRAME], f"{namespace}@{version}"
+
+    def eurostat_view(self, parts, params):
+        percentiles, medians, data_version = self.eurostat_frames(params)
+        geos = split_list(params.get("geo"))
+        start, end = parse_date(params, "start"), parse_date(params, "end")
+
+        if parts == ["percentiles"]:
+            def build():
+                return pd.DataFrame([
+                    {"coicop": key.replace("d_", "", 1), "geos": len(df), "first": df.columns[0], "last": df.columns[-1]}
+                    for key, df in percentiles.items() if len(df.columns)
+                ])
+        elif len(parts) == 2 and parts[0] == "percentiles":
+            key = parts[1] if parts[1].startswith("d_") else "d_" + parts[1]
+            if key not in percentiles:
+                raise NotFound(f"No percentiles for {parts[1]}")
+
+            def build():
+                frame = percentiles[key]
+                if geos:
+                    frame = frame[frame.index.isin(geos)]
+                # Columns are 'YYYY-MM', so string comparison is calendar order
+                columns = [
+                    col for col in frame.columns
+                    if (start is None or col >= f"{start:%Y-%m}") and (end is None or col <= f"{end:%Y-%m}")
+                ]
+                return frame[columns].reset_index()
+        elif parts == ["medians"]:
+            coicops = ["d_" + code.replace("d_", "", 1) for code in split_list(params.get("coicop"))]
+
+            def build():
+                frame = medians
+                if coicops:
+                    frame = frame[frame.index.get_level_values("coicop").isin(coicops)]
+                if geos:
+                    frame = frame[frame.index.get_level_values("geo").isin(geos)]
+                return frame.reset_index()
+        else:
+            raise NotFound(f"No route for /eurostat/{'/'.join(parts)}")
+        return data_version, build
+
+
+class SeriesRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.handle_request(send_body=True)
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def handle_request(self, send_body):
+        url = urlsplit(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        fmt = params.pop("format", None) or negotiate_format(self.headers.get("Accept", ""))
+        try:
+            response = self.server.service.respond(url.path, params, fmt)
+        except NotFound as e:
+            return self.send_message(404, str(e), send_body)
+        except ValueError as e:
+            return self.send_message(400, str(e), send_body)
+        except Exception as e:
+            print(f"❌ Error serving {self.path}: {e}")
+            return self.send_message(500, str(e), send_body)
+
+        if_none_match = [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]
+        if response.etag in if_none_match or "*" in if_none_match:
+            self.send_response(304)
+            self.send_header("ETag", response.etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return
+
+        body = response.body
+        compressed = len(body) >= GZIP_MIN_BYTES and "gzip" in self.headers.get("Accept-Encoding", "")
+        if compressed:
+            body = response.gzipped()
+        self.send_response(200)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", response.etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept, Accept-Encoding")
+        if compressed:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def send_message(self, status, message, send_body):
+        body = pd.Series({"error": message}).to_json().encode()
+        self.send_response(status)
+        self.send_header("Content-Type", CONTENT_TYPES["json"])
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    server = ThreadingHTTPServer((host, port), SeriesRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve cached ECB and Eurostat series to local tools.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--catalogue", default=DEFAULT_CATALOGUE, help="pickled series catalogue")
+    parser.add_argument("--namespace", default="ecb", help="shared store namespace of the ECB series")
+    parser.add_argument("--stub-upstream", action="store_true",
+                        help="answer upstream API calls with synthetic data (offline testing)")
+    args = parser.parse_args()
+
+    if args.stub_upstream:
+        from upstream_stubs import install_stubs
+        install_stubs()
+
+    server = make_server(SeriesService(args.catalogue, namespace=args.namespace), args.host, args.port)
+    print(f"🌍 Serving series on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import atexit
+import itertools
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping, MutableMapping
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BUDGET_BYTES = int(float(os.environ.get("DASHBOARD_SERIES_BUDGET_MB", "512")) * 1024 * 1024)
+CATEGORY_RATIO = 0.5  # object columns with fewer distinct values than this share become categorical
+
+
+def optimize_frame(df):
+    # Smaller dtypes without changing any value: float32 where the round trip
+    # is exact, downcast integers, categorical attribute columns.
+    df = df.copy(deep=False)
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_float_dtype(series) and series.dtype != np.float32:
+            values = series.to_numpy()
+            narrowed = values.astype(np.float32)
+            if np.array_equal(narrowed.astype(values.dtype), values, equal_nan=True):
+                df[col] = narrowed
+        elif pd.api.types.is_integer_dtype(series):
+            df[col] = pd.to_numeric(series, downcast="integer")
+        elif series.dtype == object or pd.api.types.is_string_dtype(series):
+            if len(series) and series.nunique(dropna=True) < CATEGORY_RATIO * len(series):
+                df[col] = series.astype("category")
+    return df
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class SeriesCache(MutableMapping):
+    # Dict of series frames bounded by a byte budget.
+    #
+    # Least recently used frames are spilled to local disk when the budget is
+    # exceeded and transparently reloaded on access. Frames mapped from the
+    # shared store are pinned: they count against the budget at their mapped
+    # size but are never spilled, their pages are backed by the store's files.
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES, spill_dir=None, optimize=True):
+        self.budget_bytes = budget_bytes
+        self.optimize = optimize
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix="dashboard-spill-")
+        self._resident = {}             # key -> DataFrame held in memory, pinned or not
+        self._lru = OrderedDict()       # evictable resident keys, oldest first
+        self._sizes = {}                # key -> bytes while resident
+        self._spilled = {}              # key -> (path, bytes)
+        self._pinned = set()
+        self._total = 0                 # sum of _sizes, kept as frames come and go
+        self._spill_ids = itertools.count()
+        self._lock = threading.RLock()
+        self.metrics = {"hits": 0, "reloads": 0, "evictions": 0}
+        if spill_dir is None:
+            atexit.register(shutil.rmtree, self.spill_dir, True)
+
+    # ------------------ Mapping protocol ------------------
+    def __getitem__(self, key):
+        with self._lock:
+            if key in self._resident:
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                self.metrics["hits"] += 1
+                return self._resident[key]
+            if key not in self._spilled:
+                raise KeyError(key)
+            path, _ = self._spilled.pop(key)
+            with open(path, "rb") as f:
+                df = pickle.load(f)
+            os.remove(path)
+            self.metrics["reloads"] += 1
+            self._insert(key, df)
+            return df
+
+    def __setitem__(self, key, df):
+        self.put(key, df)
+
+    def __delitem__(self, key):
+        with self._lock:
+            if key in self._resident:
+                del self._resident[key]
+                self._lru.pop(key, None)
+                self._total -= self._sizes.pop(key)
+                self._pinned.discard(key)
+            elif key in self._spilled:
+                path, _ = self._spilled.pop(key)
+                os.remove(path)
+            else:
+                raise KeyError(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._resident or key in self._spilled
+
+    def __iter__(self):
+        with self._lock:
+            keys = list(self._resident) + list(self._spilled)
+        return iter(keys)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._resident) + len(self._spilled)
+
+    def peek(self, key):
+        # The frame without promoting it: a spilled frame is read from disk but
+        # stays spilled, and the LRU order and metrics are left alone
+        with self._lock:
+            if key in self._resident:
+                return self._resident[key]
+            if key not in self._spilled:
+                raise KeyError(key)
+            path, _ = self._spilled[key]
+            with open(path, "rb") as f:
+                return pickle.load(f)
+
+    def view(self):
+        return CacheView(self)
+
+    # ------------------ Storage ------------------
+    def put(self, key, df, shared=False):
+        # shared=True for frames backed by the shared store's memory maps
+        with self._lock:
+            if key in self:
+                del self[key]
+            if shared:
+                self._pinned.add(key)
+            elif self.optimize and isinstance(df, pd.DataFrame):
+                df = optimize_frame(df)
+            self._insert(key, df)
+
+    def _insert(self, key, df):
+        self._resident[key] = df
+        if key not in self._pinned:
+            self._lru[key] = None
+        self._sizes[key] = frame_bytes(df)
+        self._total += self._sizes[key]
+        self._evict(keep=key)
+
+    def _evict(self, keep=None):
+        # Oldest evictable frames first; pinned frames are never visited
+        while self._total > self.budget_bytes and self._lru:
+            key = next(iter(self._lru))
+            if key == keep:  # the frame just inserted is the newest, nothing older is left
+                break
+            del self._lru[key]
+            df = self._resident.pop(key)
+            size = self._sizes.pop(key)
+            self._total -= size
+            path = os.path.join(self.spill_dir, f"{next(self._spill_ids)}.pkl")
+            with open(path, "wb") as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._spilled[key] = (path, size)
+            self.metrics["evictions"] += 1
+
+    # ------------------ Accounting ------------------
+    @property
+    def resident_bytes(self):
+        return self._total
+
+    @property
+    def shared_bytes(self):
+        with self._lock:
+            return sum(self._sizes[key] for key in self._pinned)
+
+    def memory_report(self):
+        with self._lock:
+            rows = [
+                (key, self._sizes[key], "shared" if key in self._pinned else "resident")
+                for key in self._resident
+            ] + [(key, size, "spilled") for key, (_, size) in self._spilled.items()]
+        report = pd.DataFrame(rows, columns=["Key", "Bytes", "State"])
+        return report.sort_values("Bytes", ascending=False, ignore_index=True)
+
+
+class CacheView(Mapping):
+    # Read-only view of a SeriesCache for bulk readers (publishing): frames are
+    # read through peek(), so a pass over every series reloads nothing into the
+    # cache and evicts nothing from it
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def __getitem__(self, key):
+        return self.cache.peek(key)
+
+    def __iter__(self):
+        return iter(self.cache)
+
+    def __len__(self):
+        return len(self.cache)
@@ -0,0 +1,260 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STORE_DIR = os.environ.get("DASHBOARD_STORE_DIR", os.path.join(tempfile.gettempdir(), "dashboard_series_store"))
+READ_ATTEMPTS = 3  # a load that races a prune retries on the current version
+PRUNE_GRACE = 60  # seconds a superseded version stays readable after its successor is published
+
+
+class SharedSeriesStore:
+    # Read-only series store shared by every session and worker process.
+    #
+    # Frames are published as a versioned directory of .npy files and opened
+    # with np.load(mmap_mode="r"), so all readers map the same pages instead of
+    # holding private copies. A writer builds a new version next to the old one
+    # and then swaps the CURRENT pointer atomically; readers keep whatever
+    # version they already opened.
+    #
+    # Layout: <root>/<namespace>/v000003/{manifest.json, 0_OBS_VALUE.npy, ...}
+    #         <root>/<namespace>/CURRENT  -> "v000003"
+
+    def __init__(self, root=DEFAULT_STORE_DIR, keep_versions=3):
+        self.root = root
+        self.keep_versions = keep_versions
+        self._lock = threading.Lock()
+        self._opened = {}  # (namespace, version) -> {name: DataFrame}
+        self._manifests = {}  # (namespace, version) -> parsed manifest.json
+
+    # ------------------ Publishing ------------------
+    def publish(self, namespace, frames, extra=None):
+        ns_dir = os.path.join(self.root, namespace)
+        os.makedirs(ns_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".publish-", dir=ns_dir)
+
+        manifest = {"published_at": time.time(), "extra": extra or {}, "frames": {}}
+        try:
+            for idx, (name, df) in enumerate(frames.items()):
+                manifest["frames"][name] = self._write_frame(tmp_dir, str(idx), df)
+            with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+                json.dump(manifest, f)
+
+            # Claim the next free version number; rename is atomic per directory
+            version = self._latest_version_number(ns_dir) + 1
+            while True:
+                target = os.path.join(ns_dir, f"v{version:06d}")
+                try:
+                    os.rename(tmp_dir, target)
+                    break
+                except OSError:
+                    if not os.path.exists(target):
+                        raise
+                    version += 1
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        pointer_tmp = os.path.join(ns_dir, f".CURRENT-{os.getpid()}-{threading.get_ident()}")
+        with open(pointer_tmp, "w") as f:
+            f.write(f"v{version:06d}")
+        os.replace(pointer_tmp, os.path.join(ns_dir, "CURRENT"))
+
+        self.prune(namespace)
+        print(f"✅ Published {len(frames)} frames to store '{namespace}' as v{version:06d}")
+        return f"v{version:06d}"
+
+    def _write_frame(self, directory, prefix, df):
+        spec = {"index": self._write_index(directory, prefix, df.index), "index_names": list(df.index.names)}
+        if self._is_matrix(df):
+            # Wide all-numeric frame (e.g. Eurostat percentiles): one 2D array
+            file_name = f"{prefix}__values.npy"
+            np.save(os.path.join(directory, file_name), np.ascontiguousarray(df.to_numpy()))
+            spec.update(layout="matrix", file=file_name, columns=self._encode_labels(df.columns))
+            return spec
+
+        # Long frame (e.g. ECB series): one array per column, strings as codes
+        columns = []
+        for col_idx, col in enumerate(df.columns):
+            entry = self._write_values(directory, f"{prefix}_{col_idx}.npy", df[col])
+            entry["name"] = col
+            columns.append(entry)
+        spec.update(layout="columns", columns=columns, length=len(df))
+        return spec
+
+    def _write_index(self, directory, prefix, index):
+        # Index levels keep their dtype; a default RangeIndex is not stored
+        if isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1 and index.name is None:
+            return None
+        return [
+            self._write_values(directory, f"{prefix}__index{level}.npy", pd.Series(index.get_level_values(level)))
+            for level in range(index.nlevels)
+        ]
+
+    @staticmethod
+    def _write_values(directory, file_name, series):
+        path = os.path.join(directory, file_name)
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = series.to_numpy()
+            np.save(path, values if values.dtype.kind == "M" else series.to_numpy(dtype="datetime64[ns]"))
+            return {"file": file_name, "kind": "datetime"}
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            np.save(path, series.to_numpy())
+            return {"file": file_name, "kind": "numeric"}
+        codes, uniques = pd.factorize(series.astype("object"), use_na_sentinel=True)
+        np.save(path, codes.astype(np.int32))
+        return {
+            "file": file_name, "kind": "category", "categories": [str(u) for u in uniques],
+            "categorical": isinstance(series.dtype, pd.CategoricalDtype),
+        }
+
+    @staticmethod
+    def _is_matrix(df):
+        return (
+            len(df.columns) > 0
+            and all(pd.api.types.is_float_dtype(dtype) for dtype in df.dtypes)
+            and len(set(df.dtypes)) == 1
+        )
+
+    @staticmethod
+    def _encode_labels(labels):
+        if isinstance(labels, pd.MultiIndex):
+            return [[str(level) for level in label] for label in labels]
+        return [str(label) for label in labels]
+
+    # ------------------ Reading ------------------
+    def current_version(self, namespace):
+        try:
+            with open(os.path.join(self.root, namespace, "CURRENT")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def manifest(self, namespace, version=None):
+        version = version or self.current_version(namespace)
+        if version is None:
+            return None
+        # Published versions never change, so each manifest is parsed once
+        with self._lock:
+            cached = self._manifests.get((namespace, version))
+        if cached is not None:
+            return cached
+        with open(os.path.join(self.root, namespace, version, "manifest.json")) as f:
+            manifest = json.load(f)
+        with self._lock:
+            self._manifests[(namespace, version)] = manifest
+        return manifest
+
+    def load(self, namespace, version=None, max_age=None):
+        # Returns {name: DataFrame} backed by read-only memory maps, or None
+        return self.load_versioned(namespace, version, max_age)[0]
+
+    def load_versioned(self, namespace, version=None, max_age=None):
+        # (frames, version the frames were read from), or (None, None)
+        pinned = version is not None
+        for _ in range(READ_ATTEMPTS):
+            version = version or self.current_version(namespace)
+            if version is None:
+                return None, None
+            try:
+                frames = self._load_version(namespace, version, max_age)
+                return (frames, version) if frames is not None else (None, None)
+            except FileNotFoundError:
+                # Pruned by another writer while we were opening it
+                if pinned:
+                    return None, None
+                version = None
+        return None, None
+
+    def _load_version(self, namespace, version, max_age):
+        manifest = self.manifest(namespace, version)
+        if max_age is not None and time.time() - manifest["published_at"] > max_age:
+            return None
+        with self._lock:
+            cached = self._opened.get((namespace, version))
+        if cached is not None:
+            return cached
+
+        version_dir = os.path.join(self.root, namespace, version)
+        frames = {
+            name: self._read_frame(version_dir, spec)
+            for name, spec in manifest["frames"].items()
+        }
+        with self._lock:
+            # Drop handles to superseded versions of this namespace
+            for opened_key in [k for k in self._opened if k[0] == namespace and k[1] != version]:
+                del self._opened[opened_key]
+            for manifest_key in [k for k in self._manifests if k[0] == namespace and k[1] != version]:
+                del self._manifests[manifest_key]
+            self._opened[(namespace, version)] = frames
+        return frames
+
+    @classmethod
+    def _read_frame(cls, version_dir, spec):
+        index = cls._read_index(version_dir, spec)
+        if spec["layout"] == "matrix":
+            values = np.load(os.path.join(version_dir, spec["file"]), mmap_mode="r")
+            return pd.DataFrame(values, index=index, columns=spec["columns"], copy=False)
+
+        data = {entry["name"]: cls._read_values(version_dir, entry) for entry in spec["columns"]}
+        return pd.DataFrame(data, index=index, copy=False)
+
+    @classmethod
+    def _read_index(cls, version_dir, spec):
+        entries = spec.get("index")
+        if not entries:
+            return None
+        if not isinstance(entries[0], dict):
+            # Versions published before index levels were stored as arrays
+            if isinstance(entries[0], list):
+                return pd.MultiIndex.from_tuples([tuple(label) for label in entries], names=spec["index_names"])
+            return pd.Index(entries, name=spec["index_names"][0])
+        levels = [cls._read_values(version_dir, entry) for entry in entries]
+        if len(levels) == 1:
+            return pd.Index(levels[0], name=spec["index_names"][0])
+        return pd.MultiIndex.from_arrays(levels, names=spec["index_names"])
+
+    @staticmethod
+    def _read_values(version_dir, entry):
+        values = np.load(os.path.join(version_dir, entry["file"]), mmap_mode="r")
+        if entry["kind"] != "category":
+            return values
+        categorical = pd.Categorical.from_codes(values, categories=entry["categories"])
+        return categorical if entry.get("categorical", True) else np.asarray(categorical, dtype=object)
+
+    # ------------------ Housekeeping ------------------
+    @staticmethod
+    def _latest_version_number(ns_dir):
+        numbers = [int(name[1:]) for name in os.listdir(ns_dir) if name.startswith("v") and name[1:].isdigit()]
+        return max(numbers, default=0)
+
+    def prune(self, namespace):
+        # Keep the newest versions; readers that still map an older one keep
+        # their pages alive until they drop them (POSIX unlink semantics).
+        # A version is only removed once its successor has been current for
+        # PRUNE_GRACE seconds, so sessions still opening it can finish.
+        ns_dir = os.path.join(self.root, namespace)
+        versions = sorted(name for name in os.listdir(ns_dir) if name.startswith("v") and name[1:].isdigit())
+        current = self.current_version(namespace)
+        now = time.time()
+        for name, successor in zip(versions[:-self.keep_versions], versions[1:]):
+            if name == current:
+                continue
+            try:
+                superseded_at = os.path.getmtime(os.path.join(ns_dir, successor))
+            except FileNotFoundError:
+                superseded_at = 0
+            if now - superseded_at < PRUNE_GRACE:
+                continue
+            shutil.rmtree(os.path.join(ns_dir, name), ignore_errors=True)
+            with self._lock:
+                self._manifests.pop((namespace, name), None)
+
+
+# One store per process; every session reads through the same mappings
+shared_store = SharedSeriesStore()
@@ -0,0 +1,80 @@
+import threading
+import time
+
+
+class _Call:
+    # One in-flight execution that followers wait on.
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    # Coalesce concurrent calls for the same key into one in-flight execution.
+    # Every caller that arrives while a key is being fetched waits for the
+    # leader and receives the same result (or the same exception).
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> _Call currently in flight
+        self.metrics = {
+            "requests": 0,      # calls to do()
+            "fetches": 0,       # executions of the wrapped function
+            "coalesced": 0,     # calls served by another caller's fetch
+            "errors": 0,        # fetches that raised
+            "fetch_seconds": 0.0,
+        }
+        self.key_metrics = {}  # key -> {"fetches", "coalesced", "last_seconds"}
+
+    def do(self, key, fn):
+        with self._lock:
+            self.metrics["requests"] += 1
+            per_key = self.key_metrics.setdefault(key, {"fetches": 0, "coalesced": 0, "last_seconds": None})
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.metrics["coalesced"] += 1
+                per_key["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        start = time.perf_counter()
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._calls.pop(key, None)
+                self.metrics["fetches"] += 1
+                self.metrics["fetch_seconds"] += elapsed
+                per_key["fetches"] += 1
+                per_key["last_seconds"] = elapsed
+                if call.error is not None:
+                    self.metrics["errors"] += 1
+            call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return list(self._calls)
+
+    def snapshot_metrics(self):
+        with self._lock:
+            snapshot = dict(self.metrics)
+            snapshot["in_flight"] = len(self._calls)
+        return snapshot
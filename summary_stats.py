@@ -0,0 +1,254 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+BLOCK_SIZE = 64  # observations per precomputed block summary
+
+
+class StatsAccumulator:
+    # Mergeable summary of a run of observations: Welford moments, min/max,
+    # non-null count, plus the first/last dates and the latest value.
+
+    __slots__ = ("count", "mean", "m2", "min", "max", "first_date", "last_date", "latest")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self.first_date = None
+        self.last_date = None
+        self.latest = np.nan
+
+    @classmethod
+    def from_arrays(cls, dates, values):
+        acc = cls()
+        if len(values) == 0:
+            return acc
+        acc.first_date = dates[0]
+        acc.last_date = dates[-1]
+        acc.latest = values[-1]
+        valid = values[~np.isnan(values)]
+        if valid.size:
+            acc.count = int(valid.size)
+            acc.mean = float(valid.mean())
+            acc.m2 = float(((valid - acc.mean) ** 2).sum())
+            acc.min = float(valid.min())
+            acc.max = float(valid.max())
+        return acc
+
+    def merge(self, other):
+        # Combine with an accumulator covering the observations right after this one
+        if other.first_date is None:
+            return self
+        if self.first_date is None:
+            return other.copy()
+
+        merged = StatsAccumulator()
+        merged.first_date = self.first_date
+        merged.last_date = other.last_date
+        merged.latest = other.latest
+        merged.count = self.count + other.count
+        if merged.count:
+            delta = other.mean - self.mean
+            merged.mean = self.mean + delta * other.count / merged.count
+            merged.m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / merged.count
+        merged.min = np.fmin(self.min, other.min)
+        merged.max = np.fmax(self.max, other.max)
+        return merged
+
+    def copy(self):
+        acc = StatsAccumulator()
+        for slot in self.__slots__:
+            setattr(acc, slot, getattr(self, slot))
+        return acc
+
+    @property
+    def std(self):
+        # Sample standard deviation, as pandas' Series.std()
+        return np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+    def to_frame(self):
+        if self.first_date is None:
+            return pd.DataFrame(columns=["Metric", "Value"])
+        stats = {
+            "Min": self.min,
+            "Max": self.max,
+            "Mean": self.mean if self.count else np.nan,
+            "Std Dev": self.std,
+            "Latest": self.latest,
+            "Count": self.count,
+            "Start Date": pd.Timestamp(self.first_date).strftime("%Y-%m-%d"),
+            "End Date": pd.Timestamp(self.last_date).strftime("%Y-%m-%d"),
+        }
+        return pd.DataFrame(
+            [(k, str(v)) for k, v in stats.items()],
+            columns=["Metric", "Value"]
+        )
+
+
+def _row_bytes(dates, values):
+    # (date, value) rows as one buffer, so a digest does not depend on how appends were chunked
+    return np.column_stack([dates.view("int64"), values.view("int64")]).tobytes()
+
+
+class _SeriesStats:
+    # Block summaries of one series. Only the observations of the unfinished
+    # last block are held; full blocks keep their accumulator and date bounds,
+    # and the raw values of a block are read back from the series frame when a
+    # range query cuts through it.
+
+    def __init__(self, block_size):
+        self.block_size = block_size
+        self.length = 0  # observations summarised
+        self.blocks = []  # one accumulator per full block of block_size observations
+        self.tail_dates = np.array([], dtype="datetime64[ns]")
+        self.tail_values = np.array([], dtype=float)
+        self.total = StatsAccumulator()
+        self.in_frame_order = True  # False when the frame rows were sorted before summarising
+        self._bounds = None  # (first dates, last dates) of the full blocks, built on the first range query
+        self._digest = hashlib.sha1()  # over every (date, value) row, to recognise an extended series
+
+    @property
+    def last_date(self):
+        return self.total.last_date
+
+    def digest(self):
+        return self._digest.hexdigest()
+
+    def append(self, dates, values):
+        self._digest.update(_row_bytes(dates, values))
+        self.length += len(values)
+        self.total = self.total.merge(StatsAccumulator.from_arrays(dates, values))
+
+        # Complete the unfinished block, then summarise every block the new rows fill
+        dates = np.concatenate([self.tail_dates, dates])
+        values = np.concatenate([self.tail_values, values])
+        full = len(values) // self.block_size * self.block_size
+        for block_start in range(0, full, self.block_size):
+            block_stop = block_start + self.block_size
+            self.blocks.append(StatsAccumulator.from_arrays(dates[block_start:block_stop], values[block_start:block_stop]))
+        self.tail_dates, self.tail_values = dates[full:].copy(), values[full:].copy()
+
+    def query(self, start, end, read):
+        # Accumulator over observations dated in [start, end] (datetime64 or None);
+        # read(lo, hi) returns the (dates, values) of rows [lo, hi) of the series
+        size = self.block_size
+        if self._bounds is None or len(self._bounds[0]) != len(self.blocks):
+            self._bounds = (
+                np.array([block.first_date for block in self.blocks], dtype="datetime64[ns]"),
+                np.array([block.last_date for block in self.blocks], dtype="datetime64[ns]"),
+            )
+        firsts, lasts = self._bounds
+        if len(self.tail_values):
+            firsts = np.append(firsts, self.tail_dates[0])
+            lasts = np.append(lasts, self.tail_dates[-1])
+        lo = 0 if start is None else int(np.searchsorted(lasts, start, side="left"))
+        hi = len(firsts) if end is None else int(np.searchsorted(firsts, end, side="right"))
+
+        acc = StatsAccumulator()
+        for i in range(lo, hi):
+            inside = (start is None or firsts[i] >= start) and (end is None or lasts[i] <= end)
+            if inside and i < len(self.blocks):
+                acc = acc.merge(self.blocks[i])
+                continue
+            if i < len(self.blocks):
+                dates, values = read(i * size, (i + 1) * size)
+            else:
+                dates, values = self.tail_dates, self.tail_values
+            keep = np.ones(len(dates), dtype=bool)
+            if start is not None:
+                keep &= dates >= start
+            if end is not None:
+                keep &= dates <= end
+            acc = acc.merge(StatsAccumulator.from_arrays(dates[keep], values[keep]))
+        return acc
+
+
+class SummaryStatsStore:
+    # Per-series summary statistics maintained as observations arrive.
+    #
+    # Full-history summaries are O(1); arbitrary date ranges merge the
+    # precomputed block summaries and read at most two partial blocks back
+    # from the series frame, which source(key) returns.
+
+    def __init__(self, block_size=BLOCK_SIZE, source=None):
+        self.block_size = block_size
+        self.source = source
+        self._series = {}
+
+    def __contains__(self, key):
+        return key in self._series
+
+    def update(self, key, dates, values):
+        # Append only the new tail when the fetch extends what we already hold;
+        # any revision of earlier observations triggers a rebuild.
+        dates, values, in_order = self._as_arrays(dates, values)
+        state = self._series.get(key)
+        if (
+            state is not None
+            and state.length <= len(values)
+            and hashlib.sha1(_row_bytes(dates[:state.length], values[:state.length])).hexdigest() == state.digest()
+        ):
+            if len(values) > state.length:
+                state.append(dates[state.length:], values[state.length:])
+            state.in_frame_order = state.in_frame_order and in_order
+            return state
+
+        state = _SeriesStats(self.block_size)
+        state.append(dates, values)
+        state.in_frame_order = in_order
+        self._series[key] = state
+        return state
+
+    def append(self, key, dates, values):
+        # New observations strictly after the last stored date
+        dates, values, _ = self._as_arrays(dates, values)
+        state = self._series.setdefault(key, _SeriesStats(self.block_size))
+        if state.last_date is not None and len(dates) and dates[0] <= state.last_date:
+            raise ValueError(f"Observations for {key} must be appended after {state.last_date}.")
+        state.append(dates, values)
+        return state
+
+    def remove(self, key):
+        self._series.pop(key, None)
+
+    def summary(self, key, start=None, end=None):
+        # None when the key is unknown or its frame no longer matches the summaries
+        state = self._series.get(key)
+        if state is None:
+            return None
+        if start is None and end is None:
+            return state.total
+        start = None if start is None else np.datetime64(pd.Timestamp(start), "ns")
+        end = None if end is None else np.datetime64(pd.Timestamp(end), "ns")
+        try:
+            return state.query(start, end, lambda lo, hi: self._read(key, state, lo, hi))
+        except LookupError:
+            return None
+
+    def summary_frame(self, key, start=None, end=None):
+        acc = self.summary(key, start, end)
+        return None if acc is None else acc.to_frame()
+
+    def _read(self, key, state, lo, hi):
+        # Rows [lo, hi) of the series in date order, read from its frame
+        frame = self.source(key) if self.source is not None else None
+        if frame is None or len(frame) != state.length:
+            raise LookupError(key)
+        if state.in_frame_order:
+            frame = frame.iloc[lo:hi]
+        dates, values, _ = self._as_arrays(frame["TIME_PERIOD"], frame["OBS_VALUE"])
+        return (dates, values) if state.in_frame_order else (dates[lo:hi], values[lo:hi])
+
+    @staticmethod
+    def _as_arrays(dates, values):
+        # Date-sorted arrays, and whether they were sorted already
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy(dtype="datetime64[ns]")
+        values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+        if len(dates) > 1 and (np.diff(dates.view("int64")) < 0).any():
+            order = np.argsort(dates, kind="stable")
+            return dates[order], values[order], False
+        return dates, values, True
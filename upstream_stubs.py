@@ -0,0 +1,71 @@
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Synthetic stand-ins for the ECB / Eurostat clients, for offline runs of the
+# dashboards (load_test.py) and the series API (series_api.py --stub-upstream).
+
+
+def stub_series(key, start=None, **kwargs):
+    # Deterministic synthetic ECB series shaped like the API's csvdata output
+    rng = np.random.default_rng(zlib.crc32(key.encode()))
+    freq = key.split(".")[1] if "." in key else "M"
+    dates = pd.date_range("1999-01-01", "2025-06-01", freq={"Q": "QS", "A": "YS"}.get(freq, "MS"))
+    if freq == "Q":
+        periods = [f"{d.year}-Q{d.quarter}" for d in dates]
+    elif freq == "A":
+        periods = list(dates.strftime("%Y"))
+    else:
+        periods = list(dates.strftime("%Y-%m"))
+    df = pd.DataFrame({
+        "KEY": key,
+        "FREQ": freq,
+        "TIME_PERIOD": periods,
+        "OBS_VALUE": (100 + np.cumsum(rng.normal(0.2, 1, len(dates)))).round(2),
+        "OBS_STATUS": "A",
+        "TITLE": f"Stub {key.split('.')[0]} series",
+        "TITLE_COMPL": f"Stub series {key}",
+        "UNIT": "INX",
+        "REF_AREA": "U2",
+    })
+    if start:
+        df = df[pd.to_datetime(df["TIME_PERIOD"], errors="coerce") >= pd.Timestamp(start)]
+    return df.reset_index(drop=True)
+
+
+def stub_eurostat(dataset_code, filter_pars=None, flags=False):
+    # prc_hicp_midx-like index levels for every requested coicop x geo
+    months = list(pd.period_range("2000-01", "2025-05", freq="M").astype(str))
+    rows = []
+    for coicop in filter_pars["coicop"]:
+        for geo in filter_pars["geo"]:
+            rng = np.random.default_rng(zlib.crc32((coicop + geo).encode()))
+            rows.append(["M", filter_pars.get("unit", "I15"), coicop, geo] + list(100 + np.cumsum(rng.normal(0.15, 0.5, len(months)))))
+    return pd.DataFrame(rows, columns=["freq", "unit", "coicop", "geo\\TIME_PERIOD"] + months)
+
+
+def stub_eurostat_tsv(dataset_code, filter_pars=None):
+    # The same slice as the TSV lines the Eurostat API streams
+    df = stub_eurostat(dataset_code, filter_pars)
+    yield "freq,unit,coicop,geo\\TIME_PERIOD\t" + "\t".join(f"{month} " for month in df.columns[4:])
+    for row in df.itertuples(index=False):
+        yield ",".join(row[:4]) + "\t" + "\t".join(f"{value:.2f} " for value in row[4:])
+
+
+def install_stubs(latency=0.0):
+    # Patch every client the pages reach; latency simulates one network round trip
+    import eurostat
+    import eurostat_stream
+    import sdmx_batch
+
+    def delayed(fn):
+        def wrapper(*args, **kwargs):
+            time.sleep(latency)
+            return fn(*args, **kwargs)
+        return wrapper
+
+    eurostat.get_data_df = delayed(stub_eurostat)
+    eurostat_stream.stream_tsv = delayed(stub_eurostat_tsv)
+    sdmx_batch.default_fetcher.fetch = delayed(lambda keys, start_date=None: {key: stub_series(key, start_date) for key in keys})
@@ -0,0 +1,227 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: only writers inside one process are serialized
+    fcntl = None
+
+# Absolute, so every process (dashboard, API, ingestion) shares one store whatever its working directory
+DEFAULT_VINTAGE_DIR = os.path.abspath(os.environ.get(
+    "DASHBOARD_VINTAGE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "series_vintages")
+))
+CHECKPOINT_EVERY = 12  # deltas between full snapshots, bounds the work of one as-of rebuild
+SNAPSHOT_CACHE_SIZE = 64  # rebuilt snapshots kept per process
+
+
+def observations(df):
+    # TIME_PERIOD -> OBS_VALUE, one value per period
+    dates = pd.to_datetime(df["TIME_PERIOD"], errors="coerce")
+    values = pd.to_numeric(df["OBS_VALUE"], errors="coerce").to_numpy(dtype=float)
+    series = pd.Series(values, index=pd.DatetimeIndex(dates), name="OBS_VALUE")
+    series = series[series.index.notna()]
+    return series[~series.index.duplicated(keep="last")].sort_index()
+
+
+def diff_observations(old, new):
+    # Periods whose value was revised, periods that were appended, periods that disappeared
+    previous = old.reindex(new.index)
+    known = new.index.isin(old.index)
+    same = (previous.to_numpy() == new.to_numpy()) | (np.isnan(previous.to_numpy()) & np.isnan(new.to_numpy()))
+    changed = new[known & ~same]
+    added = new[~known]
+    removed = old.index.difference(new.index)
+    return changed, added, removed
+
+
+class VintageStore:
+    # Every fetched vintage of every series, kept as deltas.
+    #
+    # The first fetch of a series is stored in full; each later fetch that
+    # differs stores only the revised and appended observations (and the
+    # periods that disappeared). Every CHECKPOINT_EVERY deltas a full snapshot
+    # is written instead, so an "as of" rebuild reads one snapshot plus at
+    # most that many deltas.
+    #
+    # Layout: <root>/<key>/index.json         vintages in fetch order
+    #         <root>/<key>/000000.npz, ...    one file per vintage
+    #         <root>/<key>/.lock              held by the process recording a vintage
+    #
+    # Writers of one key are serialized across processes by the lock file, so
+    # two processes never claim the same vintage number; readers need no lock
+    # because files are written before the index that lists them is replaced.
+
+    def __init__(self, root=DEFAULT_VINTAGE_DIR, checkpoint_every=CHECKPOINT_EVERY):
+        self.root = os.path.abspath(root)
+        self.checkpoint_every = checkpoint_every
+        self._lock = threading.Lock()
+        self._snapshots = OrderedDict()  # (key, file) -> Series
+
+    # ------------------ Recording ------------------
+    def record(self, key, df, fetched_at=None):
+        # Store a fetched frame; returns the vintage entry, or None if nothing changed
+        if "TIME_PERIOD" not in df.columns or "OBS_VALUE" not in df.columns:
+            return None
+        new = observations(df)
+        fetched_at = pd.Timestamp(fetched_at) if fetched_at is not None else pd.Timestamp.now()
+
+        with self._writing(key):
+            index = self._read_index(key)
+            entry = {"fetched_at": fetched_at.isoformat(timespec="microseconds"), "file": f"{len(index):06d}.npz", "length": len(new)}
+            if not index:
+                entry.update(kind="base", changed=0, added=len(new), removed=0)
+                self._write_full(key, entry["file"], new)
+            else:
+                old = self._rebuild(key, index, len(index) - 1)
+                changed, added, removed = diff_observations(old, new)
+                if changed.empty and added.empty and removed.empty:
+                    return None
+                entry.update(changed=len(changed), added=len(added), removed=len(removed))
+                since_full = len(index) - 1 - max(i for i, v in enumerate(index) if v["kind"] != "delta")
+                if since_full + 1 >= self.checkpoint_every:
+                    entry["kind"] = "checkpoint"
+                    self._write_full(key, entry["file"], new)
+                else:
+                    entry["kind"] = "delta"
+                    self._write_delta(key, entry["file"], pd.concat([changed, added]).sort_index(), removed)
+            index.append(entry)
+            self._remember((key, entry["file"]), new)
+            self._write_index(key, index)
+        return entry
+
+    @contextmanager
+    def _writing(self, key):
+        # Thread lock for this process, then the key's lock file for the others
+        with self._lock:
+            os.makedirs(self._key_dir(key), exist_ok=True)
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self._key_dir(key), ".lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _key_dir(self, key):
+        return os.path.join(self.root, str(key).replace(os.sep, "_"))
+
+    def _read_index(self, key):
+        try:
+            with open(os.path.join(self._key_dir(key), "index.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def _write_index(self, key, index):
+        # Write then rename so readers never see a half-written index
+        path = os.path.join(self._key_dir(key), "index.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(index, f, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def _write_full(self, key, file_name, series):
+        self._write_arrays(
+            key, file_name,
+            dates=series.index.to_numpy(dtype="datetime64[ns]"), values=series.to_numpy(dtype=float)
+        )
+
+    def _write_delta(self, key, file_name, upserts, removed):
+        self._write_arrays(
+            key, file_name,
+            dates=upserts.index.to_numpy(dtype="datetime64[ns]"), values=upserts.to_numpy(dtype=float),
+            removed=removed.to_numpy(dtype="datetime64[ns]")
+        )
+
+    def _write_arrays(self, key, file_name, **arrays):
+        # Write then rename, so a crash never leaves a truncated vintage behind
+        path = os.path.join(self._key_dir(key), file_name)
+        with open(path + ".tmp", "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(path + ".tmp", path)
+
+    # ------------------ Rebuilding ------------------
+    def _rebuild(self, key, index, position):
+        cached = self._snapshots.get((key, index[position]["file"]))
+        if cached is not None:
+            self._snapshots.move_to_end((key, index[position]["file"]))
+            return cached
+
+        start = max(i for i in range(position + 1) if index[i]["kind"] != "delta")
+        with np.load(os.path.join(self._key_dir(key), index[start]["file"])) as data:
+            series = pd.Series(data["values"], index=pd.DatetimeIndex(data["dates"]), name="OBS_VALUE")
+        for entry in index[start + 1:position + 1]:
+            with np.load(os.path.join(self._key_dir(key), entry["file"])) as data:
+                upserts = pd.Series(data["values"], index=pd.DatetimeIndex(data["dates"]), name="OBS_VALUE")
+                removed = pd.DatetimeIndex(data["removed"])
+            series = series.drop(removed.union(upserts.index), errors="ignore")
+            series = pd.concat([series, upserts]).sort_index()
+        self._remember((key, index[position]["file"]), series)
+        return series
+
+    def _remember(self, cache_key, series):
+        self._snapshots[cache_key] = series
+        self._snapshots.move_to_end(cache_key)
+        while len(self._snapshots) > SNAPSHOT_CACHE_SIZE:
+            self._snapshots.popitem(last=False)
+
+    def vintages(self, key):
+        # One row per stored vintage: fetch date, storage kind and what changed
+        index = self._read_index(key)
+        frame = pd.DataFrame(index, columns=["fetched_at", "kind", "length", "changed", "added", "removed"])
+        frame["fetched_at"] = pd.to_datetime(frame["fetched_at"], format="ISO8601")  # older entries may omit microseconds
+        return frame
+
+    def _index_at(self, key, when):
+        index = self._read_index(key)
+        if when is not None:
+            when = pd.Timestamp(when)
+            index = [entry for entry in index if pd.Timestamp(entry["fetched_at"]) <= when]
+        return index
+
+    def resolve(self, key, when=None):
+        # Fetch date of the vintage in force at `when` (latest if None), or None before the first fetch
+        index = self._index_at(key, when)
+        return index[-1]["fetched_at"] if index else None
+
+    def as_of(self, key, when=None):
+        # The series as it was known at `when` (latest vintage if None), or None before the first fetch
+        with self._lock:
+            index = self._index_at(key, when)
+            if not index:
+                return None
+            series = self._rebuild(key, index, len(index) - 1)
+        return series.rename_axis("TIME_PERIOD").reset_index()
+
+    def revisions(self, key):
+        # Every revised observation: vintage, period, value before and after
+        with self._lock:
+            index = self._read_index(key)
+            snapshots = [self._rebuild(key, index, position) for position in range(len(index))]
+
+        rows = []
+        for entry, old, new in zip(index[1:], snapshots, snapshots[1:]):
+            changed, _, _ = diff_observations(old, new)
+            for period, value in changed.items():
+                rows.append({
+                    "Vintage": pd.Timestamp(entry["fetched_at"]), "TIME_PERIOD": period,
+                    "Previous": old[period], "OBS_VALUE": value, "Revision": value - old[period],
+                })
+        return pd.DataFrame(rows, columns=["Vintage", "TIME_PERIOD", "Previous", "OBS_VALUE", "Revision"])
+
+    def storage_bytes(self, key):
+        key_dir = self._key_dir(key)
+        if not os.path.isdir(key_dir):
+            return 0
+        return sum(os.path.getsize(os.path.join(key_dir, name)) for name in os.listdir(key_dir))
+
+
+# One store per process; the files are shared by every process on the machine
+vintage_store = VintageStore()